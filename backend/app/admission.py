@@ -0,0 +1,120 @@
+"""Admission control for the public write routes and admin login.
+
+Each limited route has a token bucket per client IP (``KWEN_RATE_LIMIT_*``, e.g.
+``"5/minute"``): a client may burst up to the count, then gets 429 with
+``Retry-After`` until tokens refill. All limited routes together may run at most
+``KWEN_WRITE_CONCURRENCY`` requests at once; beyond that requests are shed with
+503 right away instead of queueing for the SQLite writer or the bcrypt threads.
+
+Buckets live in one LRU of at most ``KWEN_RATE_LIMIT_MAX_CLIENTS`` entries, so
+memory stays bounded however many addresses an attacker uses; the clients idle
+the longest are evicted first.
+"""
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from . import metrics
+from .config import settings
+
+PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0}
+
+
+@dataclass(frozen=True)
+class Limit:
+    burst: int
+    per_second: float
+
+    @classmethod
+    def parse(cls, spec: str) -> "Limit":
+        """``"<count>/<second|minute|hour>"``: up to count requests at once, refilled over the period."""
+        count, period = spec.split("/")
+        return cls(int(count), int(count) / PERIODS[period.strip()])
+
+
+class RateLimiter:
+    """Token buckets keyed by (route, client), in an LRU bounded to ``max_clients``."""
+
+    def __init__(self, max_clients: int):
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[tuple[str, str], tuple[float, float]] = OrderedDict()  # key -> (tokens, updated)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, key: tuple[str, str], limit: Limit, now: float | None = None) -> float:
+        """Take a token; returns 0 if allowed, else the seconds until one is available."""
+        now = time.monotonic() if now is None else now
+        tokens, updated = self._buckets.pop(key, (limit.burst, now))
+        tokens = min(limit.burst, tokens + (now - updated) * limit.per_second)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / limit.per_second
+        self._buckets[key] = (tokens, now)  # re-inserted at the most recently used end
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+def _reject(status: int, retry_after: float, detail: str) -> tuple[dict, dict]:
+    body = f'{{"detail":"{detail}"}}'.encode()
+    return (
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        },
+        {"type": "http.response.body", "body": body},
+    )
+
+
+class AdmissionMiddleware:
+    """Rate-limit and cap the concurrency of ``limits``' routes, keyed by (method, path)."""
+
+    def __init__(self, app: ASGIApp, limits: dict[tuple[str, str], str]):
+        self.app = app
+        self.limits = {route: Limit.parse(spec) for route, spec in limits.items()}
+        self.limiter = RateLimiter(settings.rate_limit_max_clients)
+        self.in_flight = 0
+
+    def _client(self, scope: Scope) -> str:
+        if settings.rate_limit_trust_proxy:
+            # The proxy appends the address it saw; anything before it is client-supplied
+            forwarded = Headers(scope=scope).get("x-forwarded-for")
+            if forwarded:
+                return forwarded.rsplit(",", 1)[-1].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        limit = self.limits.get((scope.get("method"), scope["path"])) if scope["type"] == "http" else None
+        if limit is None or not settings.rate_limit_enabled:
+            await self.app(scope, receive, send)
+            return
+        route = scope["path"]
+        wait = self.limiter.acquire((route, self._client(scope)), limit)
+        if wait:
+            metrics.admission_rejections.inc(route, "rate_limited")
+            for message in _reject(429, wait, "Too many requests"):
+                await send(message)
+            return
+        if self.in_flight >= settings.write_concurrency:
+            metrics.admission_rejections.inc(route, "overloaded")
+            for message in _reject(503, 1, "Server busy"):
+                await send(message)
+            return
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,104 @@
+"""Reservation analytics: bookings and guests rolled up per day, time slot and status.
+
+``reservation_rollups`` is maintained by triggers on ``reservations``, in the same
+transaction and whatever the write path (crud, write-behind, raw SQL): an insert
+adds to its row, a change of status (or date, time, guests) moves the counts from
+the old row to the new one. Dashboard queries then read at most one row per
+slot and status per day, however many reservations there are.
+
+Deleting reservations leaves the rollups as they are, so history outlives the
+raw rows. ``rebuild_rollups`` recounts everything from ``reservations`` and the
+archived reservations (see retention.py) in one pass (``python -m app.analytics``);
+it is run automatically only while the table is empty. The slot length is part of the trigger DDL, so after changing
+``KWEN_RESERVATION_SLOT_MINUTES`` run the rebuild to regroup existing data.
+"""
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .database import ARCHIVE_SCHEMA, get_sync_engine
+from .models import ReservationRollup
+
+DIMENSIONS = ("date", "time", "status")
+
+
+def _slot(sql: str) -> str:
+    """SQL for ``capacity.slot_for``: the HH:MM start of the slot ``sql`` falls into."""
+    step = settings.reservation_slot_minutes
+    minutes = f"(CAST(substr({sql}, 1, 2) AS INTEGER) * 60 + CAST(substr({sql}, 4, 2) AS INTEGER)) / {step} * {step}"
+    return f"printf('%02d:%02d', {minutes} / 60, {minutes} % 60)"
+
+
+def _key(row: str) -> str:
+    return f"{row}.date, {_slot(f'{row}.time')}, coalesce({row}.status, 'pending')"
+
+
+def _add(row: str) -> str:
+    return (
+        f"INSERT INTO reservation_rollups (date, time, status, bookings, guests) "
+        f"VALUES ({_key(row)}, 1, coalesce({row}.guests, 0)) "
+        "ON CONFLICT (date, time, status) DO UPDATE SET "
+        "bookings = bookings + 1, guests = guests + excluded.guests;"
+    )
+
+
+_MATCHES_OLD = f"(date, time, status) = ({_key('old')})"
+
+DDL = [
+    "DROP TRIGGER IF EXISTS reservation_rollups_ai",
+    "DROP TRIGGER IF EXISTS reservation_rollups_au",
+    f"CREATE TRIGGER reservation_rollups_ai AFTER INSERT ON reservations BEGIN {_add('new')} END",
+    "CREATE TRIGGER reservation_rollups_au AFTER UPDATE OF date, time, guests, status ON reservations BEGIN "
+    f"UPDATE reservation_rollups SET bookings = bookings - 1, guests = guests - coalesce(old.guests, 0) WHERE {_MATCHES_OLD}; "
+    f"DELETE FROM reservation_rollups WHERE {_MATCHES_OLD} AND bookings <= 0; "
+    f"{_add('new')} END",
+]
+
+
+def rebuild_rollups(connection: Connection) -> int:
+    """Recount the rollups from every stored reservation, archived ones included; returns the rows written."""
+    connection.execute(text("DELETE FROM reservation_rollups"))
+    columns = "date, time, guests, status"
+    return connection.execute(text(
+        "INSERT INTO reservation_rollups (date, time, status, bookings, guests) "
+        f"SELECT {_key('r')}, count(*), coalesce(sum(r.guests), 0) FROM ("
+        f"SELECT {columns} FROM main.reservations UNION ALL SELECT {columns} FROM {ARCHIVE_SCHEMA}.reservations"
+        ") AS r GROUP BY 1, 2, 3"
+    )).rowcount
+
+
+def ensure_rollups(connection: Connection) -> bool:
+    """(Re)create the triggers and build the rollups if there are none yet; True if any were built."""
+    for statement in DDL:
+        connection.execute(text(statement))
+    if connection.execute(select(ReservationRollup.date).limit(1)).first() is not None:
+        return False
+    return rebuild_rollups(connection) > 0
+
+
+async def get_reservation_stats(
+    db: AsyncSession, date_from: str, date_to: str, by: tuple[str, ...] = DIMENSIONS
+) -> list[dict]:
+    """Bookings and guests between two dates (inclusive), grouped by the ``by`` dimensions.
+
+    A single range scan of the rollups' primary key; dimensions not in ``by`` are
+    summed over and returned as None.
+    """
+    columns = [getattr(ReservationRollup, name) for name in DIMENSIONS if name in by]
+    result = await db.execute(
+        select(*columns, func.coalesce(func.sum(ReservationRollup.bookings), 0), func.coalesce(func.sum(ReservationRollup.guests), 0))
+        .where(ReservationRollup.date >= date_from, ReservationRollup.date <= date_to)
+        .group_by(*columns)
+        .order_by(*columns)
+    )
+    names = [column.key for column in columns]
+    return [
+        {**dict.fromkeys(DIMENSIONS), **dict(zip(names, row)), "bookings": row[-2], "guests": row[-1]}
+        for row in result
+    ]
+
+
+if __name__ == "__main__":
+    with get_sync_engine().begin() as conn:
+        print("Rollup rows:", rebuild_rollups(conn))
@@ -1,43 +1,98 @@
 """Authentication utilities."""
+import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-import bcrypt
-from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
+from .config import settings
+
 SECRET_KEY = "keny-cafe-secret-key-change-in-production-2024"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
 security = HTTPBearer(auto_error=False)
 
+# bcrypt releases the GIL, so a few threads keep hashing off the event loop; the
+# small bound makes a burst of login attempts queue here instead of eating the CPU
+# public requests need.
+_bcrypt_pool = ThreadPoolExecutor(max_workers=settings.auth_workers, thread_name_prefix="bcrypt")
+
+# bcrypt and jose (which pulls in cryptography) are imported on first use, not at
+# startup: most workers serve public requests only.
+
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
+async def verify_password(plain: str, hashed: str) -> bool:
+    import bcrypt
+    return await asyncio.get_running_loop().run_in_executor(
+        _bcrypt_pool, bcrypt.checkpw, plain.encode("utf-8"), hashed.encode("utf-8")
+    )
 
 
-def get_password_hash(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+async def get_password_hash(password: str) -> str:
+    import bcrypt
+    hashed = await asyncio.get_running_loop().run_in_executor(
+        _bcrypt_pool, bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt()
+    )
+    return hashed.decode("utf-8")
 
 
 def create_access_token(data: dict) -> str:
+    from jose import jwt
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+class TokenCache:
+    """LRU of already verified tokens, each kept no longer than its ``exp`` or the TTL."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    def get(self, token: str) -> str | None:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        username, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[token]
+            return None
+        self._entries.move_to_end(token)
+        return username
+
+    def put(self, token: str, username: str, exp: float):
+        self._entries[token] = (username, min(exp, time.time() + self.ttl))
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+token_cache = TokenCache(settings.token_cache_size, settings.token_cache_ttl_seconds)
+
+
 async def get_current_admin(credentials: HTTPAuthorizationCredentials | None = Depends(security)):
     if credentials is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated",
         )
+    token = credentials.credentials
+    username = token_cache.get(token)
+    if username is not None:
+        return username
+    from jose import JWTError, jwt
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str | None = payload.get("sub")
-        if username is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        username = payload.get("sub")
+        if username is None or "exp" not in payload:
             raise HTTPException(status_code=401, detail="Invalid token")
+        token_cache.put(token, username, payload["exp"])
         return username
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
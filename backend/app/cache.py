@@ -0,0 +1,114 @@
+"""In-process cache for public catalog responses (menu, categories, banners)."""
+import hashlib
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Hashable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .compression import compress_variants
+from .config import settings
+from .ipc import SharedCounter
+
+# Session.info flag set by crud mutations; the version is bumped only once the
+# transaction actually commits, so readers never cache pre-commit data under a
+# new version. The version lives in a file shared by all worker processes, so an
+# admin edit served by one worker invalidates every worker's cache.
+CATALOG_CHANGED = "catalog_changed"
+
+MAX_ENTRIES = 256  # category_id comes from the query string, keep the key space bounded
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    version: int
+    body: bytes
+    digest: str = field(init=False)
+    encoded: dict[str, bytes] = field(init=False)  # compressed once per catalog version
+
+    def __post_init__(self):
+        # Strong validator: changes exactly when the served bytes change, so it is
+        # stable across restarts and identical in every worker.
+        object.__setattr__(self, "digest", hashlib.blake2b(self.body, digest_size=16).hexdigest())
+        object.__setattr__(self, "encoded", compress_variants(self.body))
+
+    def etag(self, encoding: str | None = None) -> str:
+        # Each Content-Encoding is its own representation and needs its own strong ETag
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+    @property
+    def etags(self) -> set[str]:
+        return {self.etag()} | {self.etag(encoding) for encoding in self.encoded}
+
+
+class CatalogCache:
+    """Pre-serialized JSON bodies keyed by endpoint and query parameters.
+
+    Every entry is tagged with the catalog version it was built from; bumping the
+    version (in any process) invalidates everything at once.
+    """
+
+    def __init__(self, shared_version: SharedCounter):
+        self.hits = 0
+        self.misses = 0
+        self._shared_version = shared_version
+        self._seen_version = 0
+        self._entries: dict[Hashable, CacheEntry] = {}
+        self.on_bump: list[Callable[[int], None]] = []  # called with the new version (see snapshot.py)
+
+    @property
+    def version(self) -> int:
+        version = self._shared_version.value
+        if version != self._seen_version:
+            # Another process bumped it: drop the stale entries so they don't hold MAX_ENTRIES slots
+            self._entries.clear()
+            self._seen_version = version
+        return version
+
+    def bump(self) -> int:
+        self._entries.clear()
+        version = self._shared_version.increment()
+        for callback in self.on_bump:
+            callback(version)
+        return version
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[bytes]]) -> CacheEntry:
+        version = self.version
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == version:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = CacheEntry(version, await loader())
+        # Don't store if an admin edit landed while we were querying
+        if version == self.version and (key in self._entries or len(self._entries) < MAX_ENTRIES):
+            self._entries[key] = entry
+        return entry
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+catalog_cache = CatalogCache(SharedCounter(f"{settings.database_path}.catalog-version"))
+
+
+def mark_catalog_changed(db: AsyncSession):
+    """Invalidate the catalog cache when the current transaction commits."""
+    db.info[CATALOG_CHANGED] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session: Session):
+    if session.info.pop(CATALOG_CHANGED, False):
+        catalog_cache.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session):
+    session.info.pop(CATALOG_CHANGED, None)
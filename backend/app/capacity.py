@@ -0,0 +1,137 @@
+"""Reservation capacity: seats per time slot and overbooking protection.
+
+Booked seats live in the ``reservation_slots`` aggregate, which is updated in the
+same transaction as every reservation insert. Availability is read from that table
+directly, so it never re-counts reservations.
+"""
+from datetime import date as date_type, timedelta
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .models import Reservation, ReservationSlot
+
+
+class SlotFullError(Exception):
+    """The requested time slot doesn't have enough free seats."""
+
+    def __init__(self, date: str, time: str, available: int):
+        super().__init__(f"Only {available} seats left at {date} {time}")
+        self.date = date
+        self.time = time
+        self.available = available
+
+
+def _minutes(hhmm: str) -> int:
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def slot_for(time: str) -> str:
+    """Start of the slot a HH:MM reservation time falls into."""
+    step = settings.reservation_slot_minutes
+    return _hhmm(_minutes(time) // step * step)
+
+
+def day_slots() -> list[str]:
+    """Slot start times between opening and closing."""
+    return [
+        _hhmm(minutes)
+        for minutes in range(
+            _minutes(slot_for(settings.reservation_opening_time)),
+            _minutes(settings.reservation_closing_time),
+            settings.reservation_slot_minutes,
+        )
+    ]
+
+
+async def book_slot(db: AsyncSession, date: str, time: str, guests: int) -> str:
+    """Reserve ``guests`` seats in the slot for ``date``/``time``; returns the slot start.
+
+    The capacity check and the increment are a single conditional upsert, so
+    concurrent bookings can't both pass the check: SQLite serializes writers, and
+    the write lock is held until the surrounding transaction commits or rolls back.
+    """
+    capacity = settings.reservation_seats_per_slot
+    slot = slot_for(time)
+    stmt = (
+        insert(ReservationSlot)
+        .values(date=date, time=slot, booked=guests)
+        .on_conflict_do_update(
+            index_elements=[ReservationSlot.date, ReservationSlot.time],
+            set_={"booked": ReservationSlot.booked + guests},
+            where=ReservationSlot.booked + guests <= capacity,
+        )
+        .returning(ReservationSlot.booked)
+    )
+    booked = (await db.execute(stmt)).scalar_one_or_none() if guests <= capacity else None
+    if booked is None:
+        current = await db.scalar(
+            select(ReservationSlot.booked).where(ReservationSlot.date == date, ReservationSlot.time == slot)
+        )
+        raise SlotFullError(date, slot, max(capacity - (current or 0), 0))
+    return slot
+
+
+async def release_slot(db: AsyncSession, date: str, time: str, guests: int):
+    """Give back the seats of a cancelled reservation."""
+    await db.execute(
+        update(ReservationSlot)
+        .where(ReservationSlot.date == date, ReservationSlot.time == slot_for(time))
+        .values(booked=func.max(ReservationSlot.booked - guests, 0))
+    )
+
+
+async def get_availability(db: AsyncSession, date_from: str, days: int = 1) -> list[dict]:
+    """Free seats for every slot of ``days`` consecutive days starting at ``date_from``."""
+    start = date_type.fromisoformat(date_from)
+    dates = [(start + timedelta(days=offset)).isoformat() for offset in range(days)]
+    result = await db.execute(
+        select(ReservationSlot.date, ReservationSlot.time, ReservationSlot.booked)
+        .where(ReservationSlot.date >= dates[0], ReservationSlot.date <= dates[-1])
+    )
+    booked = {(row.date, row.time): row.booked for row in result}
+    capacity = settings.reservation_seats_per_slot
+    slots = day_slots()
+    return [
+        {
+            "date": day,
+            "slots": [
+                {
+                    "time": slot,
+                    "capacity": capacity,
+                    "booked": booked.get((day, slot), 0),
+                    "available": max(capacity - booked.get((day, slot), 0), 0),
+                }
+                for slot in slots
+            ],
+        }
+        for day in dates
+    ]
+
+
+def backfill_slots(connection: Connection) -> int:
+    """Build ``reservation_slots`` from existing reservations if it is empty; returns the slots written."""
+    if connection.execute(select(ReservationSlot.date).limit(1)).first() is not None:
+        return 0
+    totals: dict[tuple[str, str], int] = {}
+    rows = connection.execute(
+        select(Reservation.date, Reservation.time, Reservation.guests)
+        .where(Reservation.status != "cancelled")
+    )
+    for row in rows:
+        key = (row.date, slot_for(row.time))
+        totals[key] = totals.get(key, 0) + (row.guests or 0)
+    if totals:
+        connection.execute(
+            insert(ReservationSlot),
+            [{"date": d, "time": t, "booked": booked} for (d, t), booked in totals.items()],
+        )
+    return len(totals)
@@ -0,0 +1,75 @@
+"""Content-Encoding helpers: build compressed variants once, pick one per request."""
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+MIN_SIZE = 512  # smaller bodies don't win anything after headers
+MIN_SAVING = 0.1  # keep a variant only if it is at least 10% smaller
+
+# Preferred first when the client ranks encodings equally
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+FILE_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def _compress(encoding: str, data: bytes) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=9)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compress_variants(data: bytes) -> dict[str, bytes]:
+    """Compressed copies of ``data`` keyed by Content-Encoding, skipping ones that don't pay off."""
+    if len(data) < MIN_SIZE:
+        return {}
+    variants = {}
+    for encoding in SUPPORTED_ENCODINGS:
+        compressed = _compress(encoding, data)
+        if len(compressed) <= len(data) * (1 - MIN_SAVING):
+            variants[encoding] = compressed
+    return variants
+
+
+def negotiate(accept_encoding: str | None, available) -> str | None:
+    """Best encoding from ``available`` allowed by an Accept-Encoding header, or None for identity."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        if encoding not in available:
+            continue
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def precompress_file(path: str) -> list[str]:
+    """Write ``.br``/``.gz`` siblings next to ``path`` for the static mount; returns the encodings written.
+
+    Already compressed formats (JPEG, PNG, WebP) normally don't shrink enough, in
+    which case nothing is written and the original is served as is.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    variants = compress_variants(data)
+    for encoding, compressed in variants.items():
+        tmp = f"{path}{FILE_SUFFIXES[encoding]}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp, path + FILE_SUFFIXES[encoding])
+    return list(variants)
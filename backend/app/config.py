@@ -0,0 +1,74 @@
+"""Application settings, overridable with KWEN_* environment variables."""
+import os
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="KWEN_")
+
+    database_path: str = os.path.join(BASE_DIR, "keny.db")
+    init_db_on_startup: bool = True  # serve.py initializes once and turns this off for its workers
+
+    # SQLite engine profile
+    db_journal_mode: str = "WAL"  # readers don't block the writer and vice versa
+    db_auto_vacuum: str = "INCREMENTAL"  # for new databases; retention converts existing ones
+    db_synchronous: str = "NORMAL"  # safe with WAL, fsync only at checkpoints
+    db_busy_timeout_ms: int = 5000  # wait for the writer lock instead of "database is locked"
+    db_cache_size_kib: int = 16384
+    db_mmap_size: int = 64 * 1024 * 1024
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_read_pool_size: int = 10
+    db_read_max_overflow: int = 20
+    slow_query_ms: float | None = None  # log queries at least this slow
+
+    # Reservation capacity: bookings are grouped into fixed time slots
+    reservation_slot_minutes: int = 30
+    reservation_seats_per_slot: int = 40
+    reservation_opening_time: str = "09:00"  # first slot listed by the availability endpoint
+    reservation_closing_time: str = "23:00"  # no slot starts at or after this time
+
+    # Write-behind ingestion (app/ingest.py): public reservations and contact messages are
+    # acknowledged once journaled and written to the database in batches
+    write_behind: bool = False
+    ingest_journal_dir: str | None = None  # default: <database_path>.journal
+    ingest_batch_size: int = 500
+    ingest_flush_interval_ms: float = 20
+    ingest_max_pending: int = 10_000  # beyond this, submissions get 503 + Retry-After
+    ingest_max_attempts: int = 5  # then a failing batch is written row by row, failing rows set aside
+
+    # Static catalog snapshots (app/snapshot.py), republished after every catalog change
+    snapshot_publish: bool = True
+    snapshot_dir: str | None = None  # default: backend/snapshots, next to the uploaded images
+    snapshot_keep: int = 3  # previous versions kept for clients still reading them
+
+    # Retention (app/retention.py): older reservations and contact messages move to the archive database
+    retention_months: int | None = None  # None keeps everything in the main database
+    retention_batch_size: int = 1000  # rows moved per transaction
+    retention_interval_hours: float = 24
+    archive_path: str | None = None  # default: <database name>.archive.db next to the database
+
+    # Admission control (app/admission.py): per-IP token buckets as "<count>/<second|minute|hour>"
+    rate_limit_enabled: bool = True
+    rate_limit_reservations: str = "10/minute"
+    rate_limit_contact: str = "5/minute"
+    rate_limit_login: str = "5/minute"
+    rate_limit_max_clients: int = 10_000  # LRU bound on tracked (route, IP) buckets
+    rate_limit_trust_proxy: bool = False  # key clients by the last X-Forwarded-For hop (behind nginx)
+    write_concurrency: int = 32  # limited routes served at once; the rest get 503
+
+    # Admin auth
+    auth_workers: int = 2  # threads for bcrypt hashing/verification
+    token_cache_size: int = 1024
+    token_cache_ttl_seconds: float = 300
+
+    # Uploads
+    upload_max_bytes: int = 5 * 1024 * 1024
+    image_variant_widths: list[int] = [320, 640, 1280]
+    image_workers: int = 2
+
+
+settings = Settings()
@@ -1,17 +1,47 @@
 """CRUD operations."""
-from sqlalchemy import select
+from datetime import datetime, timedelta
+
+from pydantic import BaseModel
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
 
-from sqlalchemy import update, delete
+from sqlalchemy import insert, update, delete
 
+from .cache import mark_catalog_changed
+from .capacity import book_slot, release_slot
+from .events import mark_reservations_changed
 from .models import Category, MenuItem, Reservation, ContactMessage, AdminUser, Banner
-from .schemas import CategoryCreate, CategoryUpdate, MenuItemCreate, MenuItemUpdate, ReservationCreate, ContactCreate, BannerCreate, BannerUpdate
+from .schemas import CategoryCreate, CategoryUpdate, MenuItemCreate, MenuItemUpdate, ReservationCreate, ContactCreate, BannerCreate, BannerUpdate, MenuImport
 
 
-async def get_categories(db: AsyncSession):
-    result = await db.execute(
-        select(Category).order_by(Category.sort_order, Category.name)
+async def _insert_returning(db: AsyncSession, model, values: dict):
+    """INSERT ... RETURNING the new row: one statement, no flush + refresh SELECT."""
+    return await db.scalar(insert(model).values(**values).returning(model))
+
+
+async def _update_returning(db: AsyncSession, model, row_id: int, values: dict):
+    """UPDATE ... RETURNING the changed row, or None if there is no row with ``row_id``."""
+    if not values:
+        return await db.get(model, row_id)
+    stmt = (
+        update(model).where(model.id == row_id).values(**values).returning(model)
+        .execution_options(populate_existing=True)
     )
+    return await db.scalar(stmt)
+
+
+async def _delete_returning(db: AsyncSession, model, row_id: int) -> bool:
+    """DELETE by id; False if there was no such row."""
+    return await db.scalar(delete(model).where(model.id == row_id).returning(model.id)) is not None
+
+
+def categories_query():
+    return select(Category).order_by(Category.sort_order, Category.name)
+
+
+async def get_categories(db: AsyncSession):
+    result = await db.execute(categories_query())
     return result.scalars().all()
 
 
@@ -21,79 +51,159 @@ async def get_category_by_id(db: AsyncSession, category_id: int):
 
 
 async def create_category(db: AsyncSession, data: CategoryCreate):
-    category = Category(**data.model_dump())
-    db.add(category)
-    await db.flush()
-    await db.refresh(category)
-    return category
+    mark_catalog_changed(db)
+    return await _insert_returning(db, Category, data.model_dump())
 
 
 async def update_category(db: AsyncSession, category_id: int, data: CategoryUpdate):
-    stmt = update(Category).where(Category.id == category_id).values(**data.model_dump(exclude_unset=True))
-    await db.execute(stmt)
-    return await get_category_by_id(db, category_id)
+    """The updated category, or None if it doesn't exist."""
+    mark_catalog_changed(db)
+    return await _update_returning(db, Category, category_id, data.model_dump(exclude_unset=True))
 
 
-async def delete_category(db: AsyncSession, category_id: int):
-    await db.execute(delete(Category).where(Category.id == category_id))
+async def delete_category(db: AsyncSession, category_id: int) -> bool:
+    """False if the category doesn't exist."""
+    mark_catalog_changed(db)
+    return await _delete_returning(db, Category, category_id)
 
 
-async def get_menu_items(db: AsyncSession, category_id: int | None = None, available_only: bool = True):
+def menu_items_query(category_id: int | None = None, available_only: bool = True):
     q = select(MenuItem)
     if available_only:
         q = q.where(MenuItem.is_available == True)
     if category_id:
         q = q.where(MenuItem.category_id == category_id)
-    q = q.order_by(MenuItem.sort_order, MenuItem.name)
-    result = await db.execute(q)
+    return q.order_by(MenuItem.sort_order, MenuItem.name)
+
+
+async def get_menu_items(db: AsyncSession, category_id: int | None = None, available_only: bool = True):
+    result = await db.execute(menu_items_query(category_id, available_only))
     return result.scalars().all()
 
 
+def categories_with_items_query():
+    # Category.id makes the category order unique, so the items come in index order
+    # per category instead of going through a temp B-tree sort
+    return (
+        select(Category)
+        .outerjoin(Category.items.and_(MenuItem.is_available == True))
+        .options(contains_eager(Category.items))
+        .order_by(Category.sort_order, Category.name, Category.id, MenuItem.sort_order, MenuItem.name)
+        .execution_options(populate_existing=True)
+    )
+
+
+async def get_categories_with_items(db: AsyncSession):
+    """Categories with their available items, loaded in a single joined query."""
+    result = await db.execute(categories_with_items_query())
+    return result.unique().scalars().all()
+
+
 async def get_menu_item_by_id(db: AsyncSession, item_id: int):
     result = await db.execute(select(MenuItem).where(MenuItem.id == item_id))
     return result.scalar_one_or_none()
 
 
 async def create_menu_item(db: AsyncSession, data: MenuItemCreate):
-    item = MenuItem(**data.model_dump())
-    db.add(item)
-    await db.flush()
-    await db.refresh(item)
-    return item
+    mark_catalog_changed(db)
+    return await _insert_returning(db, MenuItem, data.model_dump())
 
 
 async def update_menu_item(db: AsyncSession, item_id: int, data: MenuItemUpdate):
-    stmt = update(MenuItem).where(MenuItem.id == item_id).values(**data.model_dump(exclude_unset=True))
-    await db.execute(stmt)
-    return await get_menu_item_by_id(db, item_id)
+    """The updated menu item, or None if it doesn't exist."""
+    mark_catalog_changed(db)
+    return await _update_returning(db, MenuItem, item_id, data.model_dump(exclude_unset=True))
 
 
-async def delete_menu_item(db: AsyncSession, item_id: int):
-    await db.execute(delete(MenuItem).where(MenuItem.id == item_id))
+async def delete_menu_item(db: AsyncSession, item_id: int) -> bool:
+    """False if the menu item doesn't exist."""
+    mark_catalog_changed(db)
+    return await _delete_returning(db, MenuItem, item_id)
 
 
 async def create_reservation(db: AsyncSession, data: ReservationCreate):
-    reservation = Reservation(**data.model_dump())
-    db.add(reservation)
+    """Insert a reservation; raises ``capacity.SlotFullError`` if its time slot is full."""
+    await book_slot(db, data.date, data.time, data.guests)
+    mark_reservations_changed(db)
+    return await _insert_returning(db, Reservation, data.model_dump())
+
+
+async def update_reservation_status(db: AsyncSession, reservation_id: int, status: str):
+    """Set a reservation's status, or None if it doesn't exist.
+
+    Cancelled reservations hold no seats: cancelling releases them, and reinstating
+    books them again (raising ``capacity.SlotFullError`` if the slot has filled up).
+    """
+    reservation = await db.get(Reservation, reservation_id)
+    if reservation is None:
+        return None
+    if status == reservation.status:
+        return reservation
+    if status == "cancelled":
+        await release_slot(db, reservation.date, reservation.time, reservation.guests)
+    elif reservation.status == "cancelled":
+        await book_slot(db, reservation.date, reservation.time, reservation.guests)
+    mark_reservations_changed(db)
+    reservation.status = status
     await db.flush()
-    await db.refresh(reservation)
     return reservation
 
 
-async def get_reservations(db: AsyncSession, limit: int = 100):
-    """Get all reservations for admin, newest first."""
-    result = await db.execute(
-        select(Reservation).order_by(Reservation.created_at.desc()).limit(limit)
-    )
+def reservations_query(
+    date_from: str | None = None,
+    date_to: str | None = None,
+    status: str | None = None,
+    after: tuple[datetime, int] | None = None,
+    model=Reservation,
+):
+    """Reservations newest first, optionally filtered and starting after a (created_at, id) keyset cursor.
+
+    ``model=ArchivedReservation`` queries the archive instead.
+    """
+    q = select(model)
+    if date_from:
+        q = q.where(model.date >= date_from)
+    if date_to:
+        q = q.where(model.date <= date_to)
+    if status:
+        q = q.where(model.status == status)
+    if after:
+        q = q.where(tuple_(model.created_at, model.id) < tuple_(*after))
+    return q.order_by(model.created_at.desc(), model.id.desc())
+
+
+async def get_reservations(
+    db: AsyncSession,
+    limit: int = 100,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    status: str | None = None,
+    after: tuple[datetime, int] | None = None,
+):
+    """Get reservations for admin, newest first."""
+    result = await db.execute(reservations_query(date_from, date_to, status, after).limit(limit))
     return result.scalars().all()
 
 
 async def create_contact(db: AsyncSession, data: ContactCreate):
-    msg = ContactMessage(**data.model_dump())
-    db.add(msg)
-    await db.flush()
-    await db.refresh(msg)
-    return msg
+    return await _insert_returning(db, ContactMessage, data.model_dump())
+
+
+def contacts_query(
+    date_from: str | None = None,
+    date_to: str | None = None,
+    after: tuple[datetime, int] | None = None,
+    model=ContactMessage,
+):
+    """Contact messages newest first, sent between two dates (inclusive), after a (created_at, id) cursor."""
+    q = select(model)
+    if date_from:
+        q = q.where(model.created_at >= datetime.fromisoformat(date_from))
+    if date_to:
+        q = q.where(model.created_at < datetime.fromisoformat(date_to) + timedelta(days=1))
+    if after:
+        q = q.where(tuple_(model.created_at, model.id) < tuple_(*after))
+    return q.order_by(model.created_at.desc(), model.id.desc())
 
 
 async def get_admin_by_username(db: AsyncSession, username: str):
@@ -101,11 +211,15 @@ async def get_admin_by_username(db: AsyncSession, username: str):
     return result.scalar_one_or_none()
 
 
-async def get_banners(db: AsyncSession, active_only: bool = True):
+def banners_query(active_only: bool = True):
     q = select(Banner).order_by(Banner.sort_order, Banner.id)
     if active_only:
         q = q.where(Banner.is_active == True)
-    result = await db.execute(q)
+    return q
+
+
+async def get_banners(db: AsyncSession, active_only: bool = True):
+    result = await db.execute(banners_query(active_only))
     return result.scalars().all()
 
 
@@ -115,18 +229,133 @@ async def get_banner_by_id(db: AsyncSession, banner_id: int):
 
 
 async def create_banner(db: AsyncSession, data: BannerCreate):
-    banner = Banner(**data.model_dump())
-    db.add(banner)
-    await db.flush()
-    await db.refresh(banner)
-    return banner
+    mark_catalog_changed(db)
+    return await _insert_returning(db, Banner, data.model_dump())
 
 
 async def update_banner(db: AsyncSession, banner_id: int, data: BannerUpdate):
-    stmt = update(Banner).where(Banner.id == banner_id).values(**data.model_dump(exclude_unset=True))
-    await db.execute(stmt)
-    return await get_banner_by_id(db, banner_id)
-
+    """The updated banner, or None if it doesn't exist."""
+    mark_catalog_changed(db)
+    return await _update_returning(db, Banner, banner_id, data.model_dump(exclude_unset=True))
+
+
+async def delete_banner(db: AsyncSession, banner_id: int) -> bool:
+    """False if the banner doesn't exist."""
+    mark_catalog_changed(db)
+    return await _delete_returning(db, Banner, banner_id)
+
+
+async def get_missing_ids(db: AsyncSession, model, ids: list[int]) -> list[int]:
+    """Those of ``ids`` that have no ``model`` row."""
+    if not ids:
+        return []
+    result = await db.execute(select(model.id).where(model.id.in_(set(ids))))
+    found = set(result.scalars())
+    return sorted(set(ids) - found)
+
+
+async def bulk_apply(
+    db: AsyncSession,
+    model,
+    creates: list[BaseModel],
+    updates: list[BaseModel],
+    deletes: list[int],
+) -> dict:
+    """Apply creates, by-id partial updates and deletes to ``model`` with one statement each.
+
+    Inserts and updates go out as executemany batches; the caller checks the ids exist.
+    """
+    mark_catalog_changed(db)
+    created = []
+    if creates:
+        result = await db.scalars(
+            insert(model).returning(model, sort_by_parameter_order=True),
+            [c.model_dump() for c in creates],
+        )
+        created = list(result.all())
+
+    updated = []
+    if updates:
+        # ORM bulk UPDATE by primary key: rows with the same set of keys share one executemany
+        await db.execute(update(model), [u.model_dump(exclude_unset=True) for u in updates])
+        ids = [u.id for u in updates]
+        result = await db.execute(
+            select(model).where(model.id.in_(ids)).execution_options(populate_existing=True)
+        )
+        by_id = {row.id: row for row in result.scalars()}
+        updated = [by_id[i] for i in dict.fromkeys(ids) if i in by_id]
+
+    if deletes:
+        await db.execute(delete(model).where(model.id.in_(deletes)))
+    return {"created": created, "updated": updated, "deleted": deletes}
+
+
+class MenuImportError(ValueError):
+    """The import is inconsistent (duplicates, a new category without a name); nothing was written."""
+
+
+def _check_import(data: MenuImport):
+    slugs = set()
+    for category in data.categories:
+        if category.slug in slugs:
+            raise MenuImportError(f"Duplicate category slug: {category.slug}")
+        slugs.add(category.slug)
+        names = set()
+        for item in category.items:
+            if item.name in names:
+                raise MenuImportError(f"Duplicate item in category {category.slug}: {item.name}")
+            names.add(item.name)
+
+
+async def import_menu(db: AsyncSession, data: MenuImport) -> dict:
+    """Upsert a whole menu: categories by slug, items by name within their category.
+
+    Existing rows only get the fields the import sets; nothing is deleted. Raises
+    ``MenuImportError`` before writing anything if the import is inconsistent.
+    """
+    _check_import(data)
+    slugs = [c.slug for c in data.categories]
+    result = await db.execute(select(Category.slug, Category.id).where(Category.slug.in_(slugs)))
+    category_ids = dict(result.all())
+
+    unnamed = [c.slug for c in data.categories if c.slug not in category_ids and not c.name]
+    if unnamed:
+        raise MenuImportError(f"New categories need a name: {', '.join(unnamed)}")
+    mark_catalog_changed(db)
+    new_categories = [c.model_dump(exclude={"items"}) for c in data.categories if c.slug not in category_ids]
+    changed_categories = [
+        # Without a name (e.g. a CSV without category_name) the category keeps its own
+        {"id": category_ids[c.slug], **c.model_dump(exclude={"items", "slug", *(() if c.name else ("name",))}, exclude_unset=True)}
+        for c in data.categories if c.slug in category_ids
+    ]
+    if new_categories:
+        result = await db.execute(insert(Category).returning(Category.slug, Category.id), new_categories)
+        category_ids.update(result.all())
+    if changed_categories:
+        await db.execute(update(Category), changed_categories)
 
-async def delete_banner(db: AsyncSession, banner_id: int):
-    await db.execute(delete(Banner).where(Banner.id == banner_id))
+    result = await db.execute(
+        select(MenuItem.category_id, MenuItem.name, MenuItem.id)
+        .where(MenuItem.category_id.in_(category_ids.values()))
+    )
+    item_ids = {(category_id, name): item_id for category_id, name, item_id in result.all()}
+    new_items, changed_items = [], []
+    for category in data.categories:
+        category_id = category_ids[category.slug]
+        for item in category.items:
+            item_id = item_ids.get((category_id, item.name))
+            if item_id is None:
+                new_items.append({"category_id": category_id, **item.model_dump()})
+            else:
+                # Fields the import leaves out (e.g. a CSV without a description column) are kept
+                changed_items.append({"id": item_id, **item.model_dump(exclude_unset=True)})
+    if new_items:
+        await db.execute(insert(MenuItem), new_items)
+    if changed_items:
+        await db.execute(update(MenuItem), changed_items)
+    return {
+        "categories_created": len(new_categories),
+        "categories_updated": len(changed_categories),
+        "items_created": len(new_items),
+        "items_updated": len(changed_items),
+    }
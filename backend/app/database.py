@@ -1,14 +1,61 @@
 """Database configuration and session management."""
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .config import settings
+
+DATABASE_URL = f"sqlite+aiosqlite:///{settings.database_path}"
+# Attached to every connection as schema "archive" (see retention.py)
+ARCHIVE_SCHEMA = "archive"
+ARCHIVE_PATH = settings.archive_path or f"{os.path.splitext(settings.database_path)[0]}.archive.db"
+
+
+def _apply_pragmas(dbapi_connection, query_only: bool = False):
+    cursor = dbapi_connection.cursor()
+    # Only takes effect while the database is still empty, so it must come first
+    cursor.execute(f"PRAGMA auto_vacuum={settings.db_auto_vacuum}")
+    cursor.execute(f"PRAGMA journal_mode={settings.db_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous={settings.db_synchronous}")
+    cursor.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (ARCHIVE_PATH,))
+    cursor.execute(f"PRAGMA {ARCHIVE_SCHEMA}.journal_mode={settings.db_journal_mode}")
+    cursor.execute(f"PRAGMA {ARCHIVE_SCHEMA}.synchronous={settings.db_synchronous}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.db_busy_timeout_ms)}")
+    cursor.execute(f"PRAGMA cache_size={-int(settings.db_cache_size_kib)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.db_mmap_size)}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    if query_only:
+        cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+def _create_engine(pool_size: int, max_overflow: int, query_only: bool = False) -> AsyncEngine:
+    async_engine = create_async_engine(
+        DATABASE_URL,
+        echo=False,
+        # aiosqlite defaults to NullPool (a new connection and pragma setup per session)
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+    )
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection, query_only=query_only)
+
+    return async_engine
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DATABASE_URL = f"sqlite+aiosqlite:///{os.path.join(BASE_DIR, 'keny.db')}"
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+engine = _create_engine(settings.db_pool_size, settings.db_max_overflow)
+# Separate pool for public GET routes: in WAL mode these connections read a
+# snapshot concurrently with writes in flight and can never take the write lock.
+read_engine = _create_engine(settings.db_read_pool_size, settings.db_read_max_overflow, query_only=True)
+
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+ReadSessionLocal = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
 Base = declarative_base()
 
 
@@ -25,7 +72,22 @@ async def get_db():
             await session.close()
 
 
+async def get_read_db():
+    """Dependency for read-only sessions (public GET routes)."""
+    async with ReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
 def get_sync_engine():
     """Sync engine for migrations."""
     sync_url = DATABASE_URL.replace("sqlite+aiosqlite", "sqlite")
-    return create_engine(sync_url)
+    sync_engine = create_engine(sync_url)
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection)
+
+    return sync_engine
@@ -0,0 +1,153 @@
+"""Live reservation events for the admin dashboard (``GET /api/admin/reservations/events``).
+
+Triggers add a ``reservation_events`` row whenever a reservation is inserted or its
+status changes, in the same transaction and whatever the write path. The row id is
+the SSE event id, so a client reconnecting with ``Last-Event-ID`` gets exactly the
+events it missed.
+
+Write paths call ``mark_reservations_changed``; after the commit, streams in this
+process are woken through the in-process ``broker``, and streams in other worker
+processes notice the shared counter change within ``POLL_INTERVAL``.
+"""
+import asyncio
+import json
+from typing import AsyncIterator
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import ReadSessionLocal
+from .ipc import SharedCounter
+from .models import Reservation, ReservationEvent
+from .schemas import ReservationAdminResponse
+
+RESERVATIONS_CHANGED = "reservations_changed"  # Session.info flag, like cache.CATALOG_CHANGED
+POLL_INTERVAL = 1.0  # how often a stream checks for events committed by other workers
+KEEPALIVE_INTERVAL = 15.0  # comment line sent on idle streams so proxies keep them open
+BATCH_SIZE = 100
+
+DDL = [
+    "CREATE TRIGGER IF NOT EXISTS reservation_events_ai AFTER INSERT ON reservations BEGIN "
+    "INSERT INTO reservation_events (reservation_id, type, created_at) VALUES (new.id, 'created', CURRENT_TIMESTAMP); END",
+    "CREATE TRIGGER IF NOT EXISTS reservation_events_au AFTER UPDATE OF status ON reservations "
+    "WHEN old.status IS NOT new.status BEGIN "
+    "INSERT INTO reservation_events (reservation_id, type, created_at) VALUES (new.id, 'status', CURRENT_TIMESTAMP); END",
+]
+
+
+def ensure_event_triggers(connection: Connection):
+    for statement in DDL:
+        connection.execute(text(statement))
+
+
+class Broker:
+    """Wakes event streams when reservations change, in this process or another one."""
+
+    def __init__(self, shared_version: SharedCounter):
+        self.closed = False
+        self._shared_version = shared_version
+        self._changed = asyncio.Event()
+
+    def publish(self):
+        self._shared_version.increment()
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def token(self) -> tuple[int, asyncio.Event]:
+        """Take before reading events; ``wait`` then returns at once if anything was published since."""
+        return self._shared_version.value, self._changed
+
+    async def wait(self, token: tuple[int, asyncio.Event], timeout: float) -> bool:
+        """Wait for events published after ``token``; False on timeout or shutdown."""
+        version, changed = token
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not self.closed:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(changed.wait(), min(POLL_INTERVAL, remaining))
+                return True
+            except TimeoutError:
+                if self._shared_version.value != version:
+                    return True
+        return False
+
+    def close(self):
+        """Let open streams finish, so server shutdown doesn't wait on them."""
+        self.closed = True
+        self._changed.set()
+
+
+broker = Broker(SharedCounter(f"{settings.database_path}.reservation-events"))
+
+
+def mark_reservations_changed(db: AsyncSession):
+    """Wake the event streams when the current transaction commits."""
+    db.info[RESERVATIONS_CHANGED] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_on_commit(session: Session):
+    if session.info.pop(RESERVATIONS_CHANGED, False):
+        broker.publish()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session):
+    session.info.pop(RESERVATIONS_CHANGED, None)
+
+
+async def latest_event_id() -> int:
+    async with ReadSessionLocal() as db:
+        return await db.scalar(select(func.coalesce(func.max(ReservationEvent.id), 0)))
+
+
+async def get_events(after: int, limit: int = BATCH_SIZE) -> list[tuple[ReservationEvent, Reservation | None]]:
+    """Events after id ``after`` with the reservation's current state (None if it was deleted)."""
+    async with ReadSessionLocal() as db:
+        result = await db.execute(
+            select(ReservationEvent, Reservation)
+            .outerjoin(Reservation, Reservation.id == ReservationEvent.reservation_id)
+            .where(ReservationEvent.id > after)
+            .order_by(ReservationEvent.id)
+            .limit(limit)
+        )
+        return list(result.tuples())
+
+
+def format_event(event_id: int, event_type: str, data: str) -> str:
+    return f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
+
+
+async def stream_events(after: int | None) -> AsyncIterator[str]:
+    """SSE body: events after id ``after``, then new ones as they are committed.
+
+    Without ``after`` the stream starts at the newest event and first sends a
+    ``ready`` event carrying its id, so even a client that sees no events before
+    reconnecting resumes from the right place.
+    """
+    if after is None:
+        after = await latest_event_id()
+        yield format_event(after, "ready", "{}")
+    while not broker.closed:
+        token = broker.token()
+        events = await get_events(after)
+        for reservation_event, reservation in events:
+            payload = {
+                "reservation_id": reservation_event.reservation_id,
+                "reservation": ReservationAdminResponse.model_validate(reservation).model_dump(mode="json")
+                if reservation is not None else None,
+            }
+            yield format_event(reservation_event.id, reservation_event.type, json.dumps(payload, ensure_ascii=False))
+            after = reservation_event.id
+        if len(events) == BATCH_SIZE:
+            continue  # catching up after a long disconnect
+        while not await broker.wait(token, KEEPALIVE_INTERVAL):
+            if broker.closed:
+                return
+            yield ": keepalive\n\n"
@@ -0,0 +1,242 @@
+"""Resized image variants for uploads and the srcset map served with catalog responses.
+
+For an upload ``<id>.<ext>`` the pipeline writes ``<id>-<width>w.<format>`` files
+(metadata stripped) plus a ``<id>.json`` manifest listing them. Encoding runs in a
+process pool so it never holds up the event loop.
+"""
+import asyncio
+import functools
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from multiprocessing import get_context
+
+from .config import BASE_DIR, settings
+
+UPLOADS_DIR = os.path.join(BASE_DIR, "images")
+UPLOADS_URL = "/uploads/"
+
+MEDIA_TYPES = {"avif": "image/avif", "webp": "image/webp", "jpeg": "image/jpeg", "png": "image/png"}
+EXTENSIONS = {"avif": ".avif", "webp": ".webp", "jpeg": ".jpg", "png": ".png"}
+QUALITY = {"avif": 55, "webp": 80, "jpeg": 82}
+FALLBACK_FORMATS = ("jpeg", "png")
+
+UPLOAD_NAME = re.compile(r"^[0-9a-f]{32}$")
+
+_executor: ProcessPoolExecutor | None = None
+
+
+class ImageWorkerError(Exception):
+    """The image worker died while processing an upload (e.g. killed for memory), also on a retry."""
+
+_manifests: dict[str, dict] = {}  # upload id -> manifest; manifests never change once written
+_building: dict[str, asyncio.Future] = {}  # upload id -> variants being built in this process
+
+
+@functools.cache
+def pillow_available() -> bool:
+    # Pillow is optional (uploads are then served as is) and imported only when needed
+    try:
+        import PIL.Image  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@functools.cache
+def modern_formats() -> tuple[str, ...]:
+    """Encoders available besides the JPEG/PNG fallback, best first (the order <source> elements go in)."""
+    if not pillow_available():
+        return ()
+    from PIL import features
+    return tuple(fmt for fmt in ("avif", "webp") if features.check(fmt))
+
+
+def _temp_path(path: str) -> str:
+    """A new file next to ``path`` to write before renaming over it; unique, so concurrent writers don't collide."""
+    directory, name = os.path.split(path)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+    os.close(fd)
+    return tmp
+
+
+def _encode(image, path: str, fmt: str):
+    tmp = _temp_path(path)
+    options = {"quality": QUALITY[fmt]} if fmt in QUALITY else {"optimize": True}
+    try:
+        # No exif/icc_profile arguments: the saved variant carries no metadata
+        image.save(tmp, format=fmt.upper(), **options)
+    except BaseException:
+        _remove(tmp)
+        raise
+    os.replace(tmp, path)
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def process_image(path: str, widths: tuple[int, ...]) -> dict:
+    """Write resized variants of ``path`` and its manifest; returns the manifest.
+
+    Runs in a worker process. Widths larger than the original are not upscaled.
+    Raises OSError or ValueError (also for images over Pillow's pixel limit) if
+    ``path`` is not a usable image; variants written before a failure are removed.
+    """
+    from PIL import Image, ImageOps
+
+    directory, filename = os.path.split(path)
+    upload_id = os.path.splitext(filename)[0]
+    try:
+        with Image.open(path) as source:
+            image = ImageOps.exif_transpose(source)
+            has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+            image = image.convert("RGBA" if has_alpha else "RGB")
+    except Image.DecompressionBombError as e:
+        # Not an OSError; callers treat it like any other unusable upload
+        raise ValueError(str(e)) from None
+    fallback = "png" if has_alpha else "jpeg"
+    targets = sorted({w for w in widths if w < image.width} | {min(image.width, max(widths))})
+
+    variants: dict[str, dict[str, str]] = {}
+    try:
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+            for fmt in modern_formats() + (fallback,):
+                name = f"{upload_id}-{width}w{EXTENSIONS[fmt]}"
+                _encode(resized, os.path.join(directory, name), fmt)
+                variants.setdefault(fmt, {})[str(width)] = name
+
+        manifest = {"width": image.width, "height": image.height, "variants": variants}
+        manifest_path = os.path.join(directory, f"{upload_id}.json")
+        tmp = _temp_path(manifest_path)
+        try:
+            with open(tmp, "w") as f:
+                json.dump(manifest, f)
+        except BaseException:
+            _remove(tmp)
+            raise
+        os.replace(tmp, manifest_path)
+    except BaseException:
+        for by_width in variants.values():
+            for name in by_width.values():
+                _remove(os.path.join(directory, name))
+        raise
+    return manifest
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: don't fork a process that has the event loop and DB threads running
+        _executor = ProcessPoolExecutor(max_workers=settings.image_workers, mp_context=get_context("spawn"))
+    return _executor
+
+
+def _discard_executor(executor: ProcessPoolExecutor):
+    """Drop a pool whose worker died: it refuses all further work, the next call starts a new one."""
+    global _executor
+    if _executor is executor:
+        _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _remove_variants(upload_id: str):
+    """Variants (and temp files) a worker that died midway may have left."""
+    for name in os.listdir(UPLOADS_DIR):
+        if name.startswith((f"{upload_id}-", f".{upload_id}")):
+            _remove(os.path.join(UPLOADS_DIR, name))
+
+
+async def create_variants(path: str) -> dict | None:
+    """Build the variants for an uploaded file in the process pool; None if Pillow isn't available.
+
+    Raises OSError/ValueError for an unusable image (see ``process_image``), and
+    ``ImageWorkerError`` if the worker process dies twice in a row. Identical
+    uploads arriving together share one build instead of racing on the same files.
+    """
+    if not pillow_available():
+        return None
+    upload_id = os.path.splitext(os.path.basename(path))[0]
+    build = _building.get(upload_id)
+    if build is None:
+        build = _building[upload_id] = asyncio.ensure_future(_build_variants(path, upload_id))
+        build.add_done_callback(lambda _: _building.pop(upload_id, None))
+    # Shielded: a client that disconnects doesn't cancel the build for the others
+    return await asyncio.shield(build)
+
+
+async def _build_variants(path: str, upload_id: str) -> dict:
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        executor = _get_executor()
+        try:
+            manifest = await loop.run_in_executor(executor, process_image, path, tuple(settings.image_variant_widths))
+            break
+        except BrokenExecutor as e:
+            _discard_executor(executor)
+            if attempt:
+                _remove_variants(upload_id)
+                raise ImageWorkerError(f"Image worker died processing {os.path.basename(path)}") from e
+    _manifests[upload_id] = manifest
+    return manifest
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def get_manifest(upload_id: str) -> dict | None:
+    manifest = _manifests.get(upload_id)
+    if manifest is None and UPLOAD_NAME.match(upload_id):
+        try:
+            with open(os.path.join(UPLOADS_DIR, f"{upload_id}.json")) as f:
+                manifest = _manifests[upload_id] = json.load(f)
+        except (OSError, ValueError):
+            return None
+    return manifest
+
+
+def srcset_for(image_url: str | None) -> dict[str, str] | None:
+    """``{format: "url 320w, url 640w"}`` for an uploaded image, or None if it has no variants."""
+    if not image_url or not image_url.startswith(UPLOADS_URL):
+        return None
+    manifest = get_manifest(os.path.splitext(image_url[len(UPLOADS_URL):])[0])
+    if manifest is None:
+        return None
+    return {
+        fmt: ", ".join(f"{UPLOADS_URL}{name} {width}w" for width, name in by_width.items())
+        for fmt, by_width in manifest["variants"].items()
+    }
+
+
+def pick_variant(filename: str, width: int, accept: str | None) -> str | None:
+    """File name of the smallest variant at least ``width`` wide, in the best format ``accept`` allows."""
+    manifest = get_manifest(os.path.splitext(filename)[0])
+    if manifest is None:
+        return None
+    variants = manifest["variants"]
+    fmt = next(
+        (f for f in modern_formats() if f in variants and MEDIA_TYPES[f] in (accept or "")),
+        next(f for f in variants if f in FALLBACK_FORMATS),
+    )
+    by_width = sorted((int(w), name) for w, name in variants[fmt].items())
+    return next((name for w, name in by_width if w >= width), by_width[-1][1])
+
+
+if __name__ == "__main__":
+    # Build variants for uploads that predate the pipeline: python -m app.images
+    for filename in sorted(os.listdir(UPLOADS_DIR)):
+        upload_id, ext = os.path.splitext(filename)
+        if UPLOAD_NAME.match(upload_id) and ext in (".jpg", ".jpeg", ".png", ".webp") and get_manifest(upload_id) is None:
+            process_image(os.path.join(UPLOADS_DIR, filename), tuple(settings.image_variant_widths))
+            print("Processed", filename)
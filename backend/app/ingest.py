@@ -0,0 +1,314 @@
+"""Write-behind ingestion of public reservations and contact messages (``KWEN_WRITE_BEHIND``).
+
+A submission gets its id from a counter shared by all workers, is appended to a
+local journal and is acknowledged as soon as the journal is fsynced; one fsync
+covers every submission that arrived meanwhile. A background task copies
+journaled submissions into the database in batched transactions and truncates
+the journal once everything in it is committed, so request latency doesn't
+depend on the SQLite write lock. The exception is a reservation's seats: they
+are booked in the database before it is acknowledged, one short upsert, so a
+slot is never oversold across workers.
+
+Each process appends to its own segment in the journal directory and holds a
+lock on it. On startup, segments no live process holds (left by a crash) are
+replayed; rows whose id is already in the database are skipped, so a replay can
+safely be repeated.
+
+A batch that keeps failing for a reason other than the database being locked or
+unavailable is retried ``KWEN_INGEST_MAX_ATTEMPTS`` times, then written row by row;
+rows that still fail are set aside in ``<segment>.failed`` (same format, not
+replayed) instead of holding up every later submission. Renaming that file to
+``.ndjson`` once the cause is fixed replays it on the next start.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import OperationalError
+
+from .capacity import book_slot, release_slot
+from .config import settings
+from .database import AsyncSessionLocal, ReadSessionLocal
+from .events import mark_reservations_changed
+from .ipc import SharedCounter
+from .models import ContactMessage, Reservation
+from .schemas import ContactCreate, ReservationCreate
+
+try:
+    import fcntl
+except ImportError:  # Windows: single process, every other segment is an orphan
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MODELS = {"reservation": Reservation, "contact": ContactMessage}
+
+
+class BacklogFullError(Exception):
+    """Too many submissions are waiting for the database; the client should retry later."""
+
+    def __init__(self, pending: int):
+        super().__init__(f"{pending} submissions are waiting to be written")
+        self.pending = pending
+
+
+def _encode(kind: str, row: dict) -> bytes:
+    return json.dumps({"kind": kind, "row": {**row, "created_at": row["created_at"].isoformat()}}).encode() + b"\n"
+
+
+def _decode(line: bytes) -> tuple[str, dict]:
+    record = json.loads(line)
+    row = record["row"]
+    row["created_at"] = datetime.fromisoformat(row["created_at"])
+    return record["kind"], row
+
+
+async def write_rows(records: list[tuple[str, dict]]):
+    """Insert journaled rows in one transaction, skipping ids that are already stored.
+
+    Reservations' seats were booked when they were submitted (see ``submit_reservation``).
+    """
+    async with AsyncSessionLocal() as db:
+        for kind, model in MODELS.items():
+            rows = [row for k, row in records if k == kind]
+            if not rows:
+                continue
+            existing = set(await db.scalars(select(model.id).where(model.id.in_([row["id"] for row in rows]))))
+            rows = [row for row in rows if row["id"] not in existing]
+            if kind == "reservation":
+                mark_reservations_changed(db)
+            if rows:
+                await db.execute(insert(model), rows)
+        await db.commit()
+
+
+def _append_failed(path: str, records: list[tuple[str, dict]]):
+    with open(path, "ab") as f:
+        f.write(b"".join(_encode(kind, row) for kind, row in records))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+async def write_or_set_aside(records: list[tuple[str, dict]], failed_path: str) -> int:
+    """Write ``records`` one at a time, appending the ones that fail to ``failed_path``; returns their number.
+
+    Raises ``OperationalError`` (the database is locked or unavailable) without
+    setting anything aside: that is not the rows' fault.
+    """
+    failed = []
+    for record in records:
+        try:
+            await write_rows([record])
+        except OperationalError:
+            raise
+        except Exception:
+            logger.exception("Journaled %s %s can't be written", record[0], record[1]["id"])
+            failed.append(record)
+    if failed:
+        await asyncio.to_thread(_append_failed, failed_path, failed)
+        logger.error("Set aside %d submissions in %s", len(failed), failed_path)
+    return len(failed)
+
+
+class Ingestor:
+    def __init__(self, journal_dir: str, batch_size: int, flush_interval: float, max_pending: int):
+        self.journal_dir = journal_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.ids = {kind: SharedCounter(f"{settings.database_path}.{kind}-ids") for kind in MODELS}
+        self.path: str | None = None
+        self._fd: int | None = None
+        self._unwritten: list[tuple[str, dict, asyncio.Future]] = []  # waiting for the journal writer
+        self._writing: list[tuple[str, dict, asyncio.Future]] = []  # being appended and fsynced
+        self._journaled: list[tuple[str, dict]] = []  # in the journal, not yet in the database
+        self._journal_lock = asyncio.Lock()
+        self._wake_writer = asyncio.Event()
+        self._wake_flusher = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self._failures = 0  # failed attempts at writing the first journaled batch
+
+    @property
+    def pending(self) -> int:
+        return len(self._unwritten) + len(self._writing) + len(self._journaled)
+
+    async def start(self):
+        os.makedirs(self.journal_dir, exist_ok=True)
+        replayed = await self.recover()
+        if replayed:
+            logger.warning("Replayed %d journaled submissions", replayed)
+        # Ids continue after the stored rows (the counter files may be newer or missing)
+        async with ReadSessionLocal() as db:
+            for kind, model in MODELS.items():
+                self.ids[kind].advance_to(await db.scalar(select(func.coalesce(func.max(model.id), 0))))
+        self.path = os.path.join(self.journal_dir, f"{os.getpid()}-{time.time_ns()}.ndjson")
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        self._tasks = [asyncio.create_task(self._write_journal()), asyncio.create_task(self._flush())]
+
+    async def stop(self):
+        """Write out everything journaled and remove this process's segment (kept if that fails)."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._fd is None:
+            return
+        try:
+            await self._flush_journaled()
+        except Exception:
+            logger.exception("Could not write %d journaled submissions, kept in %s", len(self._journaled), self.path)
+        else:
+            os.unlink(self.path)
+        os.close(self._fd)
+        self._fd = None
+
+    async def recover(self) -> int:
+        """Replay journal segments no running process holds; returns the number of rows."""
+        replayed = 0
+        for name in sorted(os.listdir(self.journal_dir)):
+            path = os.path.join(self.journal_dir, name)
+            if path == self.path or not name.endswith(".ndjson"):
+                continue
+            try:
+                fd = os.open(path, os.O_RDWR)
+            except FileNotFoundError:  # another worker just replayed it
+                continue
+            try:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:  # a live worker's segment
+                        continue
+                with os.fdopen(os.dup(fd), "rb") as f:
+                    records = []
+                    for line in f:
+                        try:
+                            records.append(_decode(line))
+                        except ValueError:  # torn last line of a crash mid-append, never acknowledged
+                            break
+                for start in range(0, len(records), self.batch_size):
+                    batch = records[start:start + self.batch_size]
+                    try:
+                        await write_rows(batch)
+                    except OperationalError:
+                        raise
+                    except Exception:
+                        await write_or_set_aside(batch, f"{path}.failed")
+                replayed += len(records)
+                if os.path.exists(path):
+                    os.unlink(path)
+            finally:
+                os.close(fd)
+        return replayed
+
+    async def submit(self, kind: str, row: dict) -> dict:
+        """Assign an id, journal the row and return it once it is durable."""
+        if self.pending >= self.max_pending:
+            raise BacklogFullError(self.pending)
+        row = {**row, "id": self.ids[kind].increment(), "created_at": datetime.utcnow()}
+        future = asyncio.get_running_loop().create_future()
+        self._unwritten.append((kind, row, future))
+        self._wake_writer.set()
+        await future
+        return row
+
+    async def submit_reservation(self, data: ReservationCreate) -> dict:
+        """Book the seats, then journal the reservation; raises ``SlotFullError`` if its slot is full.
+
+        The seats are booked in a transaction of their own (``book_slot``, a single
+        conditional upsert) before the reservation is acknowledged, so an acknowledged
+        reservation always has its seats, whichever worker took it. If journaling fails
+        the seats are given back; a crash in between leaves them booked without a
+        reservation, which can undersell the slot but never oversell it.
+        """
+        if self.pending >= self.max_pending:
+            raise BacklogFullError(self.pending)
+        async with AsyncSessionLocal() as db:
+            await book_slot(db, data.date, data.time, data.guests)
+            await db.commit()
+        try:
+            return await self.submit("reservation", {**data.model_dump(), "status": "pending"})
+        except Exception:
+            # Not journaled (a cancelled request is: its row is still written)
+            async with AsyncSessionLocal() as db:
+                await release_slot(db, data.date, data.time, data.guests)
+                await db.commit()
+            raise
+
+    async def submit_contact(self, data: ContactCreate) -> dict:
+        return await self.submit("contact", data.model_dump())
+
+    def _append(self, data: bytes):
+        os.write(self._fd, data)
+        os.fsync(self._fd)
+
+    async def _write_journal(self):
+        while True:
+            await self._wake_writer.wait()
+            self._wake_writer.clear()
+            while self._unwritten:
+                self._writing, self._unwritten = self._unwritten, []
+                batch = self._writing
+                try:
+                    async with self._journal_lock:
+                        await asyncio.to_thread(self._append, b"".join(_encode(kind, row) for kind, row, _ in batch))
+                        # Under the lock, so the flusher never truncates rows it hasn't seen
+                        self._journaled.extend((kind, row) for kind, row, _ in batch)
+                except Exception as e:
+                    for _, _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                finally:
+                    self._writing = []
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+                self._wake_flusher.set()
+
+    async def _flush_journaled(self):
+        while self._journaled:
+            batch = self._journaled[:self.batch_size]
+            try:
+                await write_rows(batch)
+            except OperationalError:
+                raise  # locked or unavailable database: retried until it is back
+            except Exception:
+                self._failures += 1
+                if self._failures < settings.ingest_max_attempts:
+                    raise
+                # Most likely a row that can never be written; don't let it block the rest
+                await write_or_set_aside(batch, f"{self.path}.failed")
+            self._failures = 0
+            del self._journaled[:len(batch)]
+        async with self._journal_lock:
+            if not self._journaled:
+                await asyncio.to_thread(os.ftruncate, self._fd, 0)
+
+    async def _flush(self):
+        while True:
+            await self._wake_flusher.wait()
+            # Let a few more submissions arrive so they share one transaction
+            await asyncio.sleep(self.flush_interval)
+            self._wake_flusher.clear()
+            try:
+                await self._flush_journaled()
+            except Exception:
+                # Rows stay journaled and in memory; retry on the next round
+                logger.exception("Writing %d journaled submissions failed", len(self._journaled))
+                await asyncio.sleep(1)
+                self._wake_flusher.set()
+
+
+ingestor = Ingestor(
+    settings.ingest_journal_dir or f"{settings.database_path}.journal",
+    settings.ingest_batch_size,
+    settings.ingest_flush_interval_ms / 1000,
+    settings.ingest_max_pending,
+)
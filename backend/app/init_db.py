@@ -1,21 +1,54 @@
 """Database initialization and seed data."""
-import asyncio
-from sqlalchemy.ext.asyncio import AsyncSession
+import time
 
-from .database import engine, Base, AsyncSessionLocal, get_sync_engine
+from sqlalchemy import select
+
+from .config import settings
+from .database import engine, AsyncSessionLocal
+from .ipc import async_file_lock
 from .models import Category, MenuItem, AdminUser, Banner
 from .auth import get_password_hash
+from .migrations import is_schema_current, run_migrations, stamp_schema
+
+
+async def init_database() -> dict[str, float]:
+    """Create tables and seed initial data; returns the milliseconds spent per phase.
+
+    Holds a file lock for the whole run, so several processes starting at once
+    migrate and seed the database one after another instead of racing. A database
+    whose schema stamp is current skips DDL and the seed check entirely.
+    """
+    timings = {}
+    started = time.perf_counter()
 
+    def lap(phase: str):
+        nonlocal started
+        now = time.perf_counter()
+        timings[phase] = round((now - started) * 1000, 2)
+        started = now
 
-async def init_database():
-    """Create tables and seed initial data."""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    async with async_file_lock(f"{settings.database_path}.init-lock"):
+        lap("lock_wait")
+        async with engine.connect() as conn:
+            current = await conn.run_sync(is_schema_current)
+        lap("stamp_check")
+        if current:
+            return timings
 
+        async with engine.begin() as conn:
+            await conn.run_sync(run_migrations)
+        lap("migrations")
+        await _seed()
+        lap("seed")
+        async with engine.begin() as conn:
+            await conn.run_sync(stamp_schema)
+    return timings
+
+
+async def _seed():
     async with AsyncSessionLocal() as db:
         # Check if already seeded
-        from sqlalchemy import select
-        result = await db.execute(select(Category).limit(1))
+        result = await db.execute(select(Category.id).limit(1))
         if result.scalar_one_or_none():
             return
 
@@ -26,12 +59,10 @@ async def init_database():
             {"name": "Основные блюда", "slug": "main", "description": "Основные блюда", "sort_order": 3},
             {"name": "Горячие напитки", "slug": "hot-drinks", "description": "Чай, какао, шоколад", "sort_order": 4},
         ]
-        category_objs = {}
-        for c in categories_data:
-            cat = Category(**c)
-            db.add(cat)
-            await db.flush()
-            category_objs[c["slug"]] = cat.id
+        categories = [Category(**c) for c in categories_data]
+        db.add_all(categories)
+        await db.flush()  # one multi-row INSERT ... RETURNING for the ids
+        category_objs = {c.slug: c.id for c in categories}
 
         # Seed menu items (based on Keny cafe menu from Yandex)
         menu_data = [
@@ -51,20 +82,21 @@ async def init_database():
             ("hot-drinks", "Горячий шоколад", "Настоящий бельгийский шоколад", 450),
             ("hot-drinks", "Какао", "Домашнее какао с зефиром", 400),
         ]
-        for slug, name, desc, price in menu_data:
-            item = MenuItem(
+        db.add_all(
+            MenuItem(
                 category_id=category_objs[slug],
                 name=name,
                 description=desc,
                 price=price,
                 is_available=True,
             )
-            db.add(item)
+            for slug, name, desc, price in menu_data
+        )
 
         # Default admin (username: admin, password: admin123)
         admin = AdminUser(
             username="admin",
-            hashed_password=get_password_hash("admin123"),
+            hashed_password=await get_password_hash("admin123"),
         )
         db.add(admin)
 
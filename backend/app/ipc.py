@@ -0,0 +1,87 @@
+"""Coordination between worker processes of one deployment (see serve.py)."""
+import asyncio
+import mmap
+import os
+import struct
+from contextlib import asynccontextmanager, contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev server only, locking is a no-op
+    fcntl = None
+
+_COUNTER = struct.Struct("<Q")
+
+
+@contextmanager
+def file_lock(path: str, blocking: bool = True):
+    """Exclusive advisory lock on ``path``, held for the duration of the block.
+
+    With ``blocking=False`` the block runs right away and gets False if another
+    process holds the lock (True otherwise).
+    """
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+        try:
+            yield True
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+@asynccontextmanager
+async def async_file_lock(path: str):
+    """``file_lock`` for coroutines: waits for the lock in a worker thread."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            await asyncio.to_thread(fcntl.flock, f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class SharedCounter:
+    """A 64-bit counter in a small memory-mapped file shared by every process on the host.
+
+    Reading is a plain memory load, cheap enough to do on every request; increments
+    are serialized with a file lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._map: mmap.mmap | None = None
+
+    def _mapped(self) -> mmap.mmap:
+        if self._map is None:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if os.fstat(fd).st_size < _COUNTER.size:
+                    os.ftruncate(fd, _COUNTER.size)
+                self._map = mmap.mmap(fd, _COUNTER.size)
+            finally:
+                os.close(fd)
+        return self._map
+
+    @property
+    def value(self) -> int:
+        return _COUNTER.unpack_from(self._mapped())[0]
+
+    def increment(self) -> int:
+        with file_lock(f"{self.path}.lock"):
+            value = self.value + 1
+            _COUNTER.pack_into(self._mapped(), 0, value)
+        return value
+
+    def advance_to(self, value: int) -> int:
+        """Raise the counter to at least ``value``; returns the current value."""
+        with file_lock(f"{self.path}.lock"):
+            if self.value < value:
+                _COUNTER.pack_into(self._mapped(), 0, value)
+            return self.value
@@ -1,12 +1,26 @@
 """FastAPI application entry point."""
+import logging
 import os
+import time
+
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 
+from . import images, metrics
+from .admission import AdmissionMiddleware
+from .events import broker
+from .config import settings
 from .database import get_db, engine, Base
 from .routes import public, admin
+from .ingest import ingestor
+from .retention import retention
 from .init_db import init_database
+from .snapshot import SNAPSHOT_DIR, publisher
+from .static import SnapshotStaticFiles, UploadsStaticFiles
+from .uploads import UploadSizeLimitMiddleware
 
 app = FastAPI(
     title="Keny Cafe API",
@@ -14,28 +28,75 @@ app = FastAPI(
     version="1.0.0",
 )
 
+app.add_middleware(UploadSizeLimitMiddleware, path="/api/admin/upload")
+app.add_middleware(AdmissionMiddleware, limits={
+    ("POST", "/api/reservations"): settings.rate_limit_reservations,
+    ("POST", "/api/contact"): settings.rate_limit_contact,
+    ("POST", "/api/admin/login"): settings.rate_limit_login,
+})
+# Outside the middlewares that reject requests, so their 413/429/503 carry the CORS headers too
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://127.0.0.1:5173", "http://localhost:3000"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Retry-After"],
 )
+# Added last so it is outermost and times the whole stack
+app.add_middleware(metrics.MetricsMiddleware)
 
 # Mount static files for uploaded images (menu items, etc.)
-UPLOADS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "images")
-os.makedirs(UPLOADS_DIR, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=UPLOADS_DIR), name="uploads")
+os.makedirs(images.UPLOADS_DIR, exist_ok=True)
+app.mount("/uploads", UploadsStaticFiles(directory=images.UPLOADS_DIR), name="uploads")
+if settings.snapshot_publish:
+    # Normally served by nginx straight from SNAPSHOT_DIR; this mount covers a bare uvicorn
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    app.mount("/snapshots", SnapshotStaticFiles(directory=SNAPSHOT_DIR), name="snapshots")
 
 app.include_router(public.router)
 app.include_router(admin.router)
 
+# Module imports plus app and route setup, before the server calls startup
+_import_ms = round((time.perf_counter() - _import_started) * 1000, 2)
+logger = logging.getLogger("uvicorn.error")  # printed by uvicorn's default log config
+
 
 @app.on_event("startup")
 async def startup():
-    await init_database()
+    timings = {"import": _import_ms}
+    if settings.init_db_on_startup:
+        timings.update(await init_database())
+    if settings.write_behind:
+        started = time.perf_counter()
+        await ingestor.start()
+        timings["ingest"] = round((time.perf_counter() - started) * 1000, 2)
+    if settings.snapshot_publish:
+        await publisher.start()
+    if settings.retention_months:
+        await retention.start()
+    metrics.startup_timings.update(timings)
+    # init_database only reports "migrations" when the schema stamp was stale
+    mode = "full init" if "migrations" in timings else "schema current" if "stamp_check" in timings else "init skipped"
+    logger.info("Startup (%s), ms: %s", mode, ", ".join(f"{phase}={ms}" for phase, ms in timings.items()))
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    broker.close()
+    await publisher.stop()
+    await retention.stop()
+    if settings.write_behind:
+        await ingestor.stop()
+    images.shutdown()
 
 
 @app.get("/api/health")
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Request latency, status codes and DB query timings in Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
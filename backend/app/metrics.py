@@ -0,0 +1,200 @@
+"""Request and DB query instrumentation, exposed in Prometheus text format on /metrics."""
+import bisect
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .cache import catalog_cache
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set."""
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, *label_values):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):  # larger values only land in +Inf (the total count)
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def expose(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self._series.items()):
+            base = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base}{"," if base else ""}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{base}{"," if base else ""}le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{_braces(base)} {series[-2]}")
+            lines.append(f"{self.name}_count{_braces(base)} {series[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def expose(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_braces(_labels(self.labels, label_values))} {value}")
+        return lines
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{name}="{escape(value)}"' for name, value in zip(names, values))
+
+
+def _braces(labels: str) -> str:
+    return f"{{{labels}}}" if labels else ""
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route"), LATENCY_BUCKETS
+)
+requests_total = Counter("http_requests_total", "HTTP requests by route and status code.", ("method", "route", "status"))
+request_queries = Histogram(
+    "http_request_db_queries", "DB queries issued per HTTP request.", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+request_query_time = Histogram(
+    "http_request_db_query_seconds", "Time spent in DB queries per HTTP request.", ("method", "route"), LATENCY_BUCKETS
+)
+query_duration = Histogram("db_query_duration_seconds", "DB query latency.", (), LATENCY_BUCKETS)
+slow_queries_total = Counter("db_slow_queries_total", "DB queries slower than KWEN_SLOW_QUERY_MS.", ())
+admission_rejections = Counter(
+    "admission_rejections_total", "Requests refused by admission control, by route and reason.", ("route", "reason")
+)
+in_flight = 0
+startup_timings: dict[str, float] = {}  # filled in by main.startup
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    query_seconds: float = 0.0
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def _route_label(scope: Scope) -> str:
+    # Route templates keep the label set bounded: /api/admin/menu/items/{item_id}, not one series per id
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if scope.get("root_path", "").startswith("/uploads") or scope["path"].startswith("/uploads/"):
+        return "/uploads"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Record latency, status code and DB query totals for every HTTP request."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        global in_flight
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight -= 1
+            _request_stats.reset(token)
+            method, route = scope["method"], _route_label(scope)
+            request_duration.observe(elapsed, method, route)
+            requests_total.inc(method, route, status)
+            request_queries.observe(stats.queries, method, route)
+            request_query_time.observe(stats.query_seconds, method, route)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # On the statement's own context: after_cursor_execute doesn't fire for a statement
+    # that raises, so a per-connection stack would keep its entry forever
+    context._query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_start
+    query_duration.observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+    if settings.slow_query_ms is not None and elapsed * 1000 >= settings.slow_query_ms:
+        slow_queries_total.inc()
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split()))
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in (
+        request_duration, requests_total, request_queries, request_query_time,
+        query_duration, slow_queries_total, admission_rejections,
+    ):
+        lines.extend(metric.expose())
+    lines += [
+        "# HELP http_requests_in_flight HTTP requests currently being served.",
+        "# TYPE http_requests_in_flight gauge",
+        f"http_requests_in_flight {in_flight}",
+    ]
+    lines += ["# HELP app_startup_milliseconds Time spent per startup phase.", "# TYPE app_startup_milliseconds gauge"]
+    lines += [f'app_startup_milliseconds{{phase="{phase}"}} {ms}' for phase, ms in startup_timings.items()]
+    cache = catalog_cache.stats()
+    lines += [
+        "# HELP catalog_cache_hits_total Catalog cache hits.",
+        "# TYPE catalog_cache_hits_total counter",
+        f"catalog_cache_hits_total {cache['hits']}",
+        "# HELP catalog_cache_misses_total Catalog cache misses.",
+        "# TYPE catalog_cache_misses_total counter",
+        f"catalog_cache_misses_total {cache['misses']}",
+    ]
+    return "\n".join(lines) + "\n"
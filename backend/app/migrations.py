@@ -0,0 +1,83 @@
+"""Schema migrations for existing databases.
+
+``Base.metadata.create_all`` only creates missing tables, so indexes added to
+models later never reach an existing ``keny.db``. Run ``python -m app.migrations``
+(or just start the app) to bring one up to date.
+
+Once a database is migrated and seeded, ``init_db`` records a stamp of the
+current schema in ``PRAGMA user_version`` (of the main and the archive
+database); while it matches, startup skips all of this.
+"""
+import zlib
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from . import models  # noqa: F401  (registers the tables on Base.metadata)
+from .analytics import DDL as ANALYTICS_DDL, ensure_rollups
+from .capacity import backfill_slots
+from .database import ARCHIVE_SCHEMA, Base, get_sync_engine
+from .events import DDL as EVENTS_DDL, ensure_event_triggers
+from .search import DDL as SEARCH_DDL, ensure_search_index
+
+
+def ensure_indexes(connection: Connection) -> list[str]:
+    """Create every index declared on the models that is missing; returns the created names."""
+    created = []
+    for table in Base.metadata.sorted_tables:
+        schema = f"{table.schema}." if table.schema else ""
+        existing = {row[1] for row in connection.execute(text(f'PRAGMA {schema}index_list("{table.name}")'))}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(connection)
+                created.append(index.name)
+    if created:
+        # Refresh planner statistics so the new indexes are picked up right away
+        connection.execute(text("PRAGMA optimize"))
+    return created
+
+
+def schema_stamp(connection: Connection) -> int:
+    """Checksum of the DDL the models declare; changes whenever a table or index does."""
+    dialect = connection.dialect
+    ddl = []
+    for table in Base.metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=dialect)))
+        ddl.extend(str(CreateIndex(index).compile(dialect=dialect)) for index in sorted(table.indexes, key=lambda i: i.name))
+    ddl.extend(SEARCH_DDL + EVENTS_DDL + ANALYTICS_DDL)
+    # user_version is a signed 32-bit integer and 0 means "never stamped"
+    return zlib.crc32("\n".join(ddl).encode()) & 0x7FFFFFFF or 1
+
+
+def is_schema_current(connection: Connection) -> bool:
+    # The archive is a separate file that can be missing or replaced, so it carries its own stamp
+    stamp = schema_stamp(connection)
+    return all(
+        connection.execute(text(f"PRAGMA {schema}.user_version")).scalar() == stamp
+        for schema in ("main", ARCHIVE_SCHEMA)
+    )
+
+
+def stamp_schema(connection: Connection):
+    stamp = schema_stamp(connection)
+    for schema in ("main", ARCHIVE_SCHEMA):
+        connection.execute(text(f"PRAGMA {schema}.user_version = {stamp}"))
+
+
+def run_migrations(connection: Connection) -> list[str]:
+    Base.metadata.create_all(connection)
+    created = ensure_indexes(connection)
+    backfill_slots(connection)
+    ensure_event_triggers(connection)
+    if ensure_rollups(connection):
+        created.append("reservation_rollups")
+    if ensure_search_index(connection):
+        created.append("menu_search")
+    return created
+
+
+if __name__ == "__main__":
+    with get_sync_engine().begin() as conn:
+        created = run_migrations(conn)
+    print("Created indexes:", ", ".join(created) if created else "none")
@@ -1,14 +1,18 @@
 """SQLAlchemy models."""
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 
-from .database import Base
+from .database import ARCHIVE_SCHEMA, Base
 
 
 class Category(Base):
     """Menu category (e.g. Coffee, Breakfast, Main dishes)."""
     __tablename__ = "categories"
+    __table_args__ = (
+        # get_categories: ORDER BY sort_order, name
+        Index("ix_categories_sort_order_name", "sort_order", "name"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -23,6 +27,15 @@ class Category(Base):
 class MenuItem(Base):
     """Menu item (dish or drink)."""
     __tablename__ = "menu_items"
+    __table_args__ = (
+        # get_menu_items: WHERE is_available ORDER BY sort_order, name
+        Index("ix_menu_items_available_sort", "is_available", "sort_order", "name"),
+        # get_menu_items(category_id=...) and the category join in get_categories_with_items
+        Index("ix_menu_items_category_available_sort", "category_id", "is_available", "sort_order", "name"),
+        # The admin list (available or not): ORDER BY sort_order, name, optionally for one category
+        Index("ix_menu_items_sort", "sort_order", "name"),
+        Index("ix_menu_items_category_sort", "category_id", "sort_order", "name"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
@@ -40,6 +53,12 @@ class MenuItem(Base):
 class Reservation(Base):
     """Table reservation."""
     __tablename__ = "reservations"
+    __table_args__ = (
+        # get_reservations: ORDER BY created_at DESC (rowid breaks ties)
+        Index("ix_reservations_created_at", "created_at"),
+        # date range filters and retention
+        Index("ix_reservations_date", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -53,9 +72,44 @@ class Reservation(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class ReservationEvent(Base):
+    """Reservation created/status-changed log behind the admin live stream; filled by triggers (see events.py)."""
+    __tablename__ = "reservation_events"
+    # AUTOINCREMENT: ids are SSE event ids and must never be reused after old events are deleted
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    reservation_id = Column(Integer, nullable=False)
+    type = Column(String(20), nullable=False)  # created, status
+    created_at = Column(DateTime, nullable=False)
+
+
+class ReservationSlot(Base):
+    """Seats booked per time slot, kept in step with reservations by ``capacity.book_slot``."""
+    __tablename__ = "reservation_slots"
+
+    date = Column(String(10), primary_key=True)  # YYYY-MM-DD
+    time = Column(String(5), primary_key=True)  # HH:MM, start of the slot
+    booked = Column(Integer, nullable=False, default=0)
+
+
+class ReservationRollup(Base):
+    """Bookings and guests per day, time slot and status, kept in step with reservations by triggers (see analytics.py)."""
+    __tablename__ = "reservation_rollups"
+
+    date = Column(String(10), primary_key=True)  # YYYY-MM-DD
+    time = Column(String(5), primary_key=True)  # HH:MM, start of the slot
+    status = Column(String(20), primary_key=True)
+    bookings = Column(Integer, nullable=False, default=0)
+    guests = Column(Integer, nullable=False, default=0)
+
+
 class ContactMessage(Base):
     """Contact form submission."""
     __tablename__ = "contact_messages"
+    __table_args__ = (
+        Index("ix_contact_messages_created_at", "created_at"),  # retention and archive listing
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -65,9 +119,25 @@ class ContactMessage(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class ArchivedReservation(Base):
+    """Reservations moved out of ``reservations`` by ``retention.py``: same columns, in the archive database."""
+    __table__ = Reservation.__table__.to_metadata(Base.metadata, schema=ARCHIVE_SCHEMA)
+
+
+class ArchivedContactMessage(Base):
+    """Contact messages moved out of ``contact_messages`` by ``retention.py``."""
+    __table__ = ContactMessage.__table__.to_metadata(Base.metadata, schema=ARCHIVE_SCHEMA)
+
+
 class Banner(Base):
     """Promotional banner (e.g. 50% off rolls)."""
     __tablename__ = "banners"
+    __table_args__ = (
+        # get_banners: WHERE is_active ORDER BY sort_order, id (id is the rowid, implicit in every index)
+        Index("ix_banners_active_sort", "is_active", "sort_order"),
+        # The admin list: ORDER BY sort_order, id
+        Index("ix_banners_sort", "sort_order"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
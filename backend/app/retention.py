@@ -0,0 +1,224 @@
+"""Retention: old reservations and contact messages move to the archive database.
+
+With ``KWEN_RETENTION_MONTHS`` set, a background job (or ``python -m app.retention``)
+moves reservations dated, and contact messages sent, more than that many months
+ago into the same tables in the archive database, which every connection has
+attached as ``archive`` (``database.ARCHIVE_PATH``). Rows move
+``KWEN_RETENTION_BATCH_SIZE`` at a time, so the write lock is only ever held
+briefly, and the freed pages are then given back to the filesystem with
+incremental vacuum. Archived rows stay readable under ``/api/admin/archive/``,
+and the analytics rollups keep counting them.
+
+A batch is committed to the archive before it is deleted from the main
+database: in WAL mode one transaction over two databases isn't atomic, and in
+this order a crash can only leave rows in both places (the next run finishes
+the delete), never in neither. Only rows identical to their archived copy are
+deleted. The row with the highest id always stays, since SQLite hands out the
+next id as the highest one plus one and must never reuse an archived id. Events
+and slot counters older than the cutoff are deleted; they have no use once their
+reservations are gone.
+
+Databases created before ``KWEN_DB_AUTO_VACUUM`` existed need a full ``VACUUM``
+once to switch to incremental vacuum. That holds the write lock for the whole
+rewrite, so the job only logs it; run ``python -m app.retention --convert`` at a
+quiet time.
+"""
+import argparse
+import asyncio
+import calendar
+import logging
+import threading
+import time
+from datetime import date, datetime
+
+from sqlalchemy import and_, delete, exists, func, insert, select
+from sqlalchemy.engine import Connection
+
+from .config import settings
+from .database import get_sync_engine
+from .ipc import file_lock
+from .models import ArchivedContactMessage, ArchivedReservation, ContactMessage, Reservation, ReservationEvent, ReservationSlot
+
+logger = logging.getLogger(__name__)
+
+BATCH_PAUSE = 0.01  # between batches, so waiting writers get the lock
+VACUUM_PAGES = 1000  # pages freed per incremental_vacuum step
+
+
+def months_ago(months: int, today: date | None = None) -> date:
+    """The same day ``months`` months before ``today`` (the month's last day if it is shorter)."""
+    today = today or date.today()
+    year, month = divmod(today.year * 12 + today.month - 1 - months, 12)
+    return date(year, month + 1, min(today.day, calendar.monthrange(year, month + 1)[1]))
+
+
+def _move(connection: Connection, model, archived, condition, batch_size: int, stop: threading.Event | None) -> int:
+    """Move the rows matching ``condition`` to the archive in id order; returns the rows moved."""
+    table, archive = model.__table__, archived.__table__
+    columns = [column.name for column in table.columns]
+    # Aliased: both tables have the same name. IS: NULL-safe equality
+    copy = archive.alias("archived")
+    archived_copy = exists().where(and_(*(copy.c[name].is_(table.c[name]) for name in columns)))
+    last_id = select(func.max(table.c.id)).scalar_subquery()
+    moved, after = 0, 0
+    while not (stop and stop.is_set()):
+        with connection.begin():
+            ids = list(connection.scalars(
+                select(table.c.id).where(condition, table.c.id > after, table.c.id < last_id)
+                .order_by(table.c.id).limit(batch_size)
+            ))
+            if not ids:
+                break
+            # OR IGNORE: rows a crashed run already copied
+            connection.execute(
+                insert(archive).prefix_with("OR IGNORE").from_select(columns, select(table).where(table.c.id.in_(ids)))
+            )
+        with connection.begin():
+            deleted = connection.execute(delete(table).where(table.c.id.in_(ids), archived_copy)).rowcount
+        if deleted < len(ids):
+            logger.error(
+                "%d rows of %s not archived: the archive has different rows with their ids",
+                len(ids) - deleted, table.name,
+            )
+        moved += deleted
+        after = ids[-1]
+        time.sleep(BATCH_PAUSE)
+    return moved
+
+
+def _delete_batch(connection: Connection, model, condition, batch_size: int) -> int:
+    with connection.begin():
+        ids = select(model.id).where(condition).order_by(model.id).limit(batch_size)
+        return connection.execute(delete(model).where(model.id.in_(ids))).rowcount
+
+
+def _is_incremental(connection: Connection) -> bool:
+    return connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2  # INCREMENTAL
+
+
+def convert_to_incremental_vacuum() -> bool:
+    """Switch an old database to incremental auto_vacuum with a full VACUUM; False if it already was.
+
+    Blocks every writer until the rewrite is done: run it at a quiet time.
+    """
+    engine = get_sync_engine()
+    try:
+        with engine.connect() as connection:
+            if _is_incremental(connection):
+                return False
+            connection.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+            connection.exec_driver_sql("VACUUM")
+            return True
+    finally:
+        engine.dispose()
+
+
+def _reclaim(connection: Connection) -> int:
+    """Release the free pages to the filesystem in small steps; returns the pages released."""
+    released = 0
+    while free := connection.exec_driver_sql("PRAGMA freelist_count").scalar():
+        # The pragma frees one page per step and execute() steps once; executescript runs it to the end
+        connection.connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({VACUUM_PAGES})")
+        released += min(free, VACUUM_PAGES)
+    return released
+
+
+def _repeat(batch, stop: threading.Event | None) -> int:
+    """Run ``batch()`` until it returns 0 or ``stop`` is set; returns the total."""
+    total = 0
+    while not (stop and stop.is_set()):
+        count = batch()
+        if not count:
+            break
+        total += count
+        time.sleep(BATCH_PAUSE)
+    return total
+
+
+def run_retention(months: int, batch_size: int, stop: threading.Event | None = None) -> dict[str, int] | None:
+    """Archive and prune everything older than ``months`` months; returns the rows per table.
+
+    Returns None if another process is already running it. ``stop`` ends the
+    run after the current batch.
+    """
+    cutoff = months_ago(months)
+    cutoff_time = datetime.combine(cutoff, datetime.min.time())
+    moves = [
+        (Reservation, ArchivedReservation, Reservation.date < cutoff.isoformat()),
+        (ContactMessage, ArchivedContactMessage, ContactMessage.created_at < cutoff_time),
+    ]
+    counts = {}
+    engine = get_sync_engine()
+    try:
+        with file_lock(f"{settings.database_path}.retention-lock", blocking=False) as locked:
+            if not locked:
+                return None
+            with engine.connect() as connection:
+                for model, archived, condition in moves:
+                    counts[model.__tablename__] = _move(connection, model, archived, condition, batch_size, stop)
+                events = ReservationEvent.created_at < cutoff_time
+                counts[ReservationEvent.__tablename__] = _repeat(
+                    lambda: _delete_batch(connection, ReservationEvent, events, batch_size), stop
+                )
+                with connection.begin():
+                    counts[ReservationSlot.__tablename__] = connection.execute(
+                        delete(ReservationSlot).where(ReservationSlot.date < cutoff.isoformat())
+                    ).rowcount
+                if _is_incremental(connection):
+                    counts["pages_released"] = _reclaim(connection)
+                else:
+                    # Without incremental auto_vacuum the freed pages are reused, the file just doesn't shrink
+                    logger.warning("Freed pages can't be released: run `python -m app.retention --convert` once")
+                    counts["pages_released"] = 0
+                connection.commit()
+    finally:
+        engine.dispose()
+    return counts
+
+
+class RetentionJob:
+    """Runs ``run_retention`` at startup and then every ``interval`` seconds, in a worker thread."""
+
+    def __init__(self, months: int, batch_size: int, interval: float):
+        self.months = months
+        self.batch_size = batch_size
+        self.interval = interval
+        self._stop = threading.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._stop.set()  # the thread stops after its current batch
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                counts = await asyncio.to_thread(run_retention, self.months, self.batch_size, self._stop)
+            except Exception:
+                logger.exception("Retention run failed")
+            else:
+                if counts and any(counts.values()):
+                    logger.info("Retention: %s", ", ".join(f"{name}={n}" for name, n in counts.items()))
+            await asyncio.sleep(self.interval)
+
+
+retention = RetentionJob(settings.retention_months or 0, settings.retention_batch_size, settings.retention_interval_hours * 3600)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.retention", description="Archive old rows once")
+    parser.add_argument("--convert", action="store_true", help="switch an old database to incremental vacuum (full VACUUM)")
+    args = parser.parse_args()
+    if args.convert:
+        print("Converted" if convert_to_incremental_vacuum() else "Already uses incremental vacuum")
+    elif not settings.retention_months:
+        raise SystemExit("Set KWEN_RETENTION_MONTHS to the number of months to keep")
+    else:
+        print(run_retention(settings.retention_months, settings.retention_batch_size) or "Already running in another process")
@@ -1,70 +1,276 @@
 """Admin API routes (auth required)."""
+import asyncio
+import base64
+import csv
+import io
 import os
-import uuid
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from datetime import date, datetime
+from typing import Literal
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database import get_db
+from ..analytics import DIMENSIONS, get_reservation_stats
+from ..cache import catalog_cache
+from ..capacity import SlotFullError
+from ..compression import precompress_file
+from ..images import UPLOADS_DIR, ImageWorkerError, create_variants, get_manifest, srcset_for
+from ..uploads import save_upload
+from ..database import get_db, ReadSessionLocal
+from ..events import stream_events
 from ..auth import verify_password, create_access_token, get_current_admin
 from ..schemas import (
     CategoryCreate, CategoryUpdate, CategoryResponse,
     MenuItemCreate, MenuItemUpdate, MenuItemResponse,
     BannerCreate, BannerUpdate, BannerResponse,
-    ReservationAdminResponse,
+    CategoryPatch, MenuItemPatch, BannerPatch, BulkRequest, BulkResponse,
+    MenuImport, MenuImportResult,
+    ReservationAdminResponse, ReservationStatusUpdate, ReservationStats, ContactAdminResponse,
     AdminLogin, Token
 )
 from ..crud import (
-    get_categories, get_category_by_id, create_category, update_category, delete_category,
-    get_menu_items, get_menu_item_by_id, create_menu_item, update_menu_item, delete_menu_item,
-    get_banners, get_banner_by_id, create_banner, update_banner, delete_banner,
-    get_reservations,
+    categories_query, create_category, update_category, delete_category,
+    menu_items_query, create_menu_item, update_menu_item, delete_menu_item,
+    banners_query, create_banner, update_banner, delete_banner,
+    reservations_query, update_reservation_status, contacts_query,
     get_admin_by_username,
+    get_missing_ids, bulk_apply, import_menu, MenuImportError,
 )
+from ..fastjson import RowSerializer
+from ..models import Category, MenuItem, Banner, Reservation, ArchivedReservation, ArchivedContactMessage
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
-# Тот же путь, что и в main.py (backend/images)
-_BASE = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-UPLOADS_DIR = os.path.join(_BASE, "images")
-ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
+EXPORT_BATCH_SIZE = 500
+MAX_STATS_DAYS = 366
+
+# List routes return pre-serialized JSON instead of validating a model per row (see fastjson.py)
+_categories_rows = RowSerializer(CategoryResponse, Category)
+_items_rows = RowSerializer(MenuItemResponse, MenuItem)
+_banners_rows = RowSerializer(BannerResponse, Banner)
+_reservations_rows = RowSerializer(ReservationAdminResponse, Reservation)
+_archived_reservations_rows = RowSerializer(ReservationAdminResponse, ArchivedReservation)
+_archived_contacts_rows = RowSerializer(ContactAdminResponse, ArchivedContactMessage)
+
+
+def _json(content: bytes, headers: dict[str, str] | None = None) -> Response:
+    return Response(content=content, media_type="application/json", headers=headers)
 
 
 @router.post("/login", response_model=Token)
 async def admin_login(data: AdminLogin, db: AsyncSession = Depends(get_db)):
     admin = await get_admin_by_username(db, data.username)
-    if not admin or not verify_password(data.password, admin.hashed_password):
+    if not admin or not await verify_password(data.password, admin.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     return {"access_token": create_access_token({"sub": admin.username}), "token_type": "bearer"}
 
 
+def _discard_upload(filepath: str, created: bool):
+    # A file this request didn't create may already be used by a menu item or banner
+    if created:
+        try:
+            os.remove(filepath)
+        except FileNotFoundError:  # an identical upload in flight removed it first
+            pass
+
+
 @router.post("/upload")
 async def upload_image(
     file: UploadFile = File(...),
     _: str = Depends(get_current_admin)
 ):
-    """Upload image for menu item. Returns URL path like /uploads/filename."""
-    ext = os.path.splitext(file.filename or "")[1].lower()
-    if ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(status_code=400, detail="Allowed: jpg, jpeg, png, webp")
-    os.makedirs(UPLOADS_DIR, exist_ok=True)
-    filename = f"{uuid.uuid4().hex}{ext}"
+    """Upload image for menu item.
+
+    Returns the URL path like /uploads/filename, plus a ``srcset`` map of the resized
+    variants per format (null if image processing is unavailable). Files are named
+    by content hash, so uploading the same photo again returns the existing URL.
+    """
+    filename, created = await save_upload(file)
     filepath = os.path.join(UPLOADS_DIR, filename)
-    content = await file.read()
-    if len(content) > 5 * 1024 * 1024:  # 5MB
-        raise HTTPException(status_code=400, detail="File too large")
-    with open(filepath, "wb") as f:
-        f.write(content)
-    return {"url": f"/uploads/{filename}"}
+    if created or get_manifest(os.path.splitext(filename)[0]) is None:
+        try:
+            await create_variants(filepath)
+        except (OSError, ValueError):
+            _discard_upload(filepath, created)
+            raise HTTPException(status_code=400, detail="Not a valid image")
+        except ImageWorkerError:
+            _discard_upload(filepath, created)
+            raise HTTPException(status_code=503, detail="Image processing failed, try again")
+    if created:
+        await asyncio.to_thread(precompress_file, filepath)
+    return {"url": f"/uploads/{filename}", "srcset": srcset_for(f"/uploads/{filename}")}
+
+
+@router.get("/cache")
+async def admin_cache_stats(_: str = Depends(get_current_admin)):
+    """Catalog cache hit/miss counters."""
+    return catalog_cache.stats()
+
+
+def _encode_cursor(row) -> str:
+    raw = f"{row.created_at.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def _page(db: AsyncSession, serializer: RowSerializer, query, limit: int) -> Response:
+    rows = await serializer.fetch(db, query.limit(limit))
+    headers = {"X-Next-Cursor": _encode_cursor(rows[-1])} if len(rows) == limit else None
+    return _json(serializer.dumps(rows), headers)
 
 
 @router.get("/reservations", response_model=list[ReservationAdminResponse])
 async def admin_list_reservations(
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = None,
+    date_from: str | None = Query(None, pattern=DATE_PATTERN),
+    date_to: str | None = Query(None, pattern=DATE_PATTERN),
+    status: str | None = None,
+    db: AsyncSession = Depends(get_db),
+    _: str = Depends(get_current_admin)
+):
+    """List reservations for admin to call and confirm, newest first.
+
+    Pages are keyset-based: pass the ``X-Next-Cursor`` response header back as ``cursor``.
+    """
+    after = _decode_cursor(cursor) if cursor else None
+    return await _page(db, _reservations_rows, reservations_query(date_from, date_to, status, after), limit)
+
+
+@router.get("/archive/reservations", response_model=list[ReservationAdminResponse])
+async def admin_list_archived_reservations(
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = None,
+    date_from: str | None = Query(None, pattern=DATE_PATTERN),
+    date_to: str | None = Query(None, pattern=DATE_PATTERN),
+    status: str | None = None,
+    db: AsyncSession = Depends(get_db),
+    _: str = Depends(get_current_admin)
+):
+    """Reservations moved to the archive by the retention job, paged like ``/reservations``."""
+    after = _decode_cursor(cursor) if cursor else None
+    query = reservations_query(date_from, date_to, status, after, model=ArchivedReservation)
+    return await _page(db, _archived_reservations_rows, query, limit)
+
+
+@router.get("/archive/contacts", response_model=list[ContactAdminResponse])
+async def admin_list_archived_contacts(
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = None,
+    date_from: str | None = Query(None, pattern=DATE_PATTERN),
+    date_to: str | None = Query(None, pattern=DATE_PATTERN),
+    db: AsyncSession = Depends(get_db),
+    _: str = Depends(get_current_admin)
+):
+    """Archived contact messages, newest first, paged with the ``X-Next-Cursor`` header."""
+    after = _decode_cursor(cursor) if cursor else None
+    query = contacts_query(date_from, date_to, after, model=ArchivedContactMessage)
+    return await _page(db, _archived_contacts_rows, query, limit)
+
+
+@router.get("/reservations/events")
+async def admin_reservation_events(
+    last_event_id: int | None = Header(None),
+    after: int | None = Query(None, ge=0),
+    _: str = Depends(get_current_admin)
+):
+    """Server-Sent Events stream of ``created`` and ``status`` reservation events as they are committed.
+
+    A client reconnecting with ``Last-Event-ID`` (or ``?after=<id>``) gets only the
+    events it missed, each with the reservation's current data.
+    """
+    return StreamingResponse(
+        stream_events(last_event_id if last_event_id is not None else after),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: nginx would otherwise hold events back in its buffer
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.put("/reservations/{reservation_id}", response_model=ReservationAdminResponse)
+async def admin_update_reservation_status(
+    reservation_id: int,
+    data: ReservationStatusUpdate,
+    db: AsyncSession = Depends(get_db),
+    _: str = Depends(get_current_admin)
+):
+    try:
+        reservation = await update_reservation_status(db, reservation_id, data.status)
+    except SlotFullError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if reservation is None:
+        raise HTTPException(status_code=404, detail="Reservation not found")
+    return reservation
+
+
+@router.get("/analytics/reservations", response_model=list[ReservationStats])
+async def admin_reservation_stats(
+    date_from: str = Query(..., pattern=DATE_PATTERN),
+    date_to: str = Query(..., pattern=DATE_PATTERN),
+    by: list[Literal["date", "time", "status"]] = Query(list(DIMENSIONS)),
     db: AsyncSession = Depends(get_db),
     _: str = Depends(get_current_admin)
 ):
-    """List all reservations for admin to call and confirm."""
-    return await get_reservations(db, limit=limit)
+    """Bookings and guests per day, time slot and/or status over a date range (inclusive).
+
+    ``?by=date&by=status`` sums over the slots of each day, ``?by=status`` over the
+    whole range. Read from the rollups, so the cost doesn't grow with the number
+    of reservations.
+    """
+    try:
+        days = (date.fromisoformat(date_to) - date.fromisoformat(date_from)).days + 1
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date")
+    if not 1 <= days <= MAX_STATS_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range must be 1 to {MAX_STATS_DAYS} days")
+    return await get_reservation_stats(db, date_from, date_to, tuple(by))
+
+
+EXPORT_COLUMNS = _reservations_rows.fields
+
+
+async def _export_rows(query, fmt: str):
+    """Yield export chunks from a server-side cursor, one batch of rows at a time."""
+    if fmt == "csv":
+        yield "\ufeff"  # BOM so Excel opens Cyrillic names correctly
+        yield ",".join(EXPORT_COLUMNS) + "\r\n"
+    async with ReadSessionLocal() as db:
+        result = await db.stream(_reservations_rows.columns_of(query).execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for batch in result.partitions():
+            if fmt == "csv":
+                buf = io.StringIO()
+                csv.writer(buf).writerows(batch)
+                yield buf.getvalue()
+            else:
+                yield _reservations_rows.dumps_lines(batch)
+
+
+@router.get("/reservations/export")
+async def admin_export_reservations(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    date_from: str | None = Query(None, pattern=DATE_PATTERN),
+    date_to: str | None = Query(None, pattern=DATE_PATTERN),
+    status: str | None = None,
+    _: str = Depends(get_current_admin)
+):
+    """Stream all matching reservations as CSV or NDJSON in bounded memory."""
+    query = reservations_query(date_from, date_to, status)
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_rows(query, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="reservations.{format}"'},
+    )
 
 
 @router.get("/categories", response_model=list[CategoryResponse])
@@ -72,7 +278,7 @@ async def admin_list_categories(
     db: AsyncSession = Depends(get_db),
     _: str = Depends(get_current_admin)
 ):
-    return await get_categories(db)
+    return _json(_categories_rows.dumps(await _categories_rows.fetch(db, categories_query())))
 
 
 @router.post("/categories", response_model=CategoryResponse)
@@ -91,10 +297,10 @@ async def admin_update_category(
     db: AsyncSession = Depends(get_db),
     _: str = Depends(get_current_admin)
 ):
-    cat = await get_category_by_id(db, category_id)
+    cat = await update_category(db, category_id, data)
     if not cat:
         raise HTTPException(status_code=404, detail="Category not found")
-    return await update_category(db, category_id, data)
+    return cat
 
 
 @router.delete("/categories/{category_id}")
@@ -103,20 +309,35 @@ async def admin_delete_category(
     db: AsyncSession = Depends(get_db),
     _: str = Depends(get_current_admin)
 ):
-    cat = await get_category_by_id(db, category_id)
-    if not cat:
+    if not await delete_category(db, category_id):
         raise HTTPException(status_code=404, detail="Category not found")
-    await delete_category(db, category_id)
     return {"ok": True}
 
 
+async def _check_bulk_ids(db: AsyncSession, model, request: BulkRequest, label: str):
+    missing = await get_missing_ids(db, model, [u.id for u in request.update] + request.delete)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"{label} not found: {', '.join(map(str, missing))}")
+
+
+@router.post("/categories/bulk", response_model=BulkResponse[CategoryResponse])
+async def admin_bulk_categories(
+    data: BulkRequest[CategoryCreate, CategoryPatch],
+    db: AsyncSession = Depends(get_db),
+    _: str = Depends(get_current_admin)
+):
+    """Create, update and delete categories in one transaction."""
+    await _check_bulk_ids(db, Category, data, "Categories")
+    return await bulk_apply(db, Category, data.create, data.update, data.delete)
+
+
 @router.get("/menu/items", response_model=list[MenuItemResponse])
 async def admin_list_items(
     category_id: int | None = None,
     db: AsyncSession = Depends(get_db),
     _: str = Depends(get_current_admin)
 ):
-    return await get_menu_items(db, category_id, available_only=False)
+    return _json(_items_rows.dumps(await _items_rows.fetch(db, menu_items_query(category_id, available_only=False))))
 
 
 @router.post("/menu/items", response_model=MenuItemResponse)
@@ -128,6 +349,72 @@ async def admin_create_item(
     return await create_menu_item(db, data)
 
 
+@router.post("/menu/items/bulk", response_model=BulkResponse[MenuItemResponse])
+async def admin_bulk_items(
+    data: BulkRequest[MenuItemCreate, MenuItemPatch],
+    db: AsyncSession = Depends(get_db),
+    _: str = Depends(get_current_admin)
+):
+    """Create, update (e.g. reprice or reorder) and delete menu items in one transaction."""
+    await _check_bulk_ids(db, MenuItem, data, "Menu items")
+    return await bulk_apply(db, MenuItem, data.create, data.update, data.delete)
+
+
+IMPORT_CSV_COLUMNS = ("category_slug", "category_name", "name", "description", "price", "is_available", "sort_order", "image_url")
+
+
+def _parse_menu_csv(text: str) -> MenuImport:
+    """Rows of IMPORT_CSV_COLUMNS (header required) grouped into categories in file order."""
+    reader = csv.DictReader(io.StringIO(text))
+    missing = {"category_slug", "name", "price"} - set(reader.fieldnames or ())
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing CSV columns: {', '.join(sorted(missing))}")
+    categories: dict[str, dict] = {}
+    for row in reader:
+        row = {key: value for key, value in row.items() if key in IMPORT_CSV_COLUMNS and value not in (None, "")}
+        slug = row.pop("category_slug", None)
+        category = categories.setdefault(slug, {"slug": slug, "items": []})
+        name = row.pop("category_name", None)
+        if name is not None:  # left out, an existing category keeps its name
+            category.setdefault("name", name)
+        category["items"].append(row)
+    try:
+        return MenuImport.model_validate({"categories": list(categories.values())})
+    except ValidationError as e:
+        error = e.errors()[0]
+        raise HTTPException(status_code=400, detail=f"{'.'.join(map(str, error['loc']))}: {error['msg']}")
+
+
+@router.post("/menu/import", response_model=MenuImportResult)
+async def admin_import_menu(
+    data: MenuImport,
+    db: AsyncSession = Depends(get_db),
+    _: str = Depends(get_current_admin)
+):
+    """Load a full menu in one transaction; re-importing the same menu updates it in place."""
+    try:
+        return await import_menu(db, data)
+    except MenuImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/menu/import/csv", response_model=MenuImportResult)
+async def admin_import_menu_csv(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    _: str = Depends(get_current_admin)
+):
+    """CSV variant of /menu/import, one item per row (see IMPORT_CSV_COLUMNS)."""
+    try:
+        text = (await file.read()).decode("utf-8-sig")  # Excel saves UTF-8 with a BOM
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8")
+    try:
+        return await import_menu(db, _parse_menu_csv(text))
+    except MenuImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.put("/menu/items/{item_id}", response_model=MenuItemResponse)
 async def admin_update_item(
     item_id: int,
@@ -135,10 +422,10 @@ async def admin_update_item(
     db: AsyncSession = Depends(get_db),
     _: str = Depends(get_current_admin)
 ):
-    item = await get_menu_item_by_id(db, item_id)
+    item = await update_menu_item(db, item_id, data)
     if not item:
         raise HTTPException(status_code=404, detail="Menu item not found")
-    return await update_menu_item(db, item_id, data)
+    return item
 
 
 @router.delete("/menu/items/{item_id}")
@@ -147,10 +434,8 @@ async def admin_delete_item(
     db: AsyncSession = Depends(get_db),
     _: str = Depends(get_current_admin)
 ):
-    item = await get_menu_item_by_id(db, item_id)
-    if not item:
+    if not await delete_menu_item(db, item_id):
         raise HTTPException(status_code=404, detail="Menu item not found")
-    await delete_menu_item(db, item_id)
     return {"ok": True}
 
 
@@ -159,7 +444,7 @@ async def admin_list_banners(
     db: AsyncSession = Depends(get_db),
     _: str = Depends(get_current_admin)
 ):
-    return await get_banners(db, active_only=False)
+    return _json(_banners_rows.dumps(await _banners_rows.fetch(db, banners_query(active_only=False))))
 
 
 @router.post("/banners", response_model=BannerResponse)
@@ -171,6 +456,17 @@ async def admin_create_banner(
     return await create_banner(db, data)
 
 
+@router.post("/banners/bulk", response_model=BulkResponse[BannerResponse])
+async def admin_bulk_banners(
+    data: BulkRequest[BannerCreate, BannerPatch],
+    db: AsyncSession = Depends(get_db),
+    _: str = Depends(get_current_admin)
+):
+    """Create, update and delete banners in one transaction."""
+    await _check_bulk_ids(db, Banner, data, "Banners")
+    return await bulk_apply(db, Banner, data.create, data.update, data.delete)
+
+
 @router.put("/banners/{banner_id}", response_model=BannerResponse)
 async def admin_update_banner(
     banner_id: int,
@@ -178,10 +474,10 @@ async def admin_update_banner(
     db: AsyncSession = Depends(get_db),
     _: str = Depends(get_current_admin)
 ):
-    banner = await get_banner_by_id(db, banner_id)
+    banner = await update_banner(db, banner_id, data)
     if not banner:
         raise HTTPException(status_code=404, detail="Banner not found")
-    return await update_banner(db, banner_id, data)
+    return banner
 
 
 @router.delete("/banners/{banner_id}")
@@ -190,8 +486,6 @@ async def admin_delete_banner(
     db: AsyncSession = Depends(get_db),
     _: str = Depends(get_current_admin)
 ):
-    banner = await get_banner_by_id(db, banner_id)
-    if not banner:
+    if not await delete_banner(db, banner_id):
         raise HTTPException(status_code=404, detail="Banner not found")
-    await delete_banner(db, banner_id)
     return {"ok": True}
@@ -1,34 +1,119 @@
 """Public API routes (no auth required)."""
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database import get_db
-from ..schemas import CategoryResponse, MenuItemResponse, ReservationCreate, ReservationResponse, ContactCreate, ContactResponse, BannerResponse
-from ..crud import get_categories, get_menu_items, create_reservation, create_contact, get_banners
+from ..cache import CacheEntry, catalog_cache
+from ..capacity import SlotFullError, get_availability
+from ..compression import negotiate
+from ..config import settings
+from ..database import get_db, get_read_db
+from ..schemas import CategoryResponse, MenuItemResponse, MenuResponse, ReservationCreate, ReservationResponse, DayAvailability, ContactCreate, ContactResponse, BannerResponse
+from ..crud import create_reservation, create_contact
+from ..fastjson import RowSerializer
+from ..ingest import BacklogFullError, ingestor
+from ..models import MenuItem
+from ..search import search_query
+from ..snapshot import render_banners, render_categories, render_items, render_menu
 
 router = APIRouter(prefix="/api", tags=["public"])
 
+# Catalog bodies are rendered by snapshot.py, so the API and the static snapshot serve the same bytes
+_items_rows = RowSerializer(MenuItemResponse, MenuItem)
+
+# Clients may keep catalog responses but must revalidate them (cheap 304s)
+CATALOG_CACHE_CONTROL = "no-cache"
+
+
+def _etag_matches(if_none_match: str | None, etags: set[str]) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") in etags for tag in if_none_match.split(","))
+
+
+def _json_response(request: Request, entry: CacheEntry) -> Response:
+    encoding = negotiate(request.headers.get("accept-encoding"), entry.encoded)
+    headers = {
+        "ETag": entry.etag(encoding),
+        "Cache-Control": CATALOG_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), entry.etags):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        return Response(content=entry.encoded[encoding], media_type="application/json", headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+@router.get("/menu", response_model=MenuResponse)
+async def get_menu(request: Request, db: AsyncSession = Depends(get_read_db)):
+    """Full public menu: categories with available items nested, plus active banners."""
+    entry = await catalog_cache.get_or_load(("menu",), lambda: render_menu(db))
+    return _json_response(request, entry)
+
 
 @router.get("/menu/categories", response_model=list[CategoryResponse])
-async def list_categories(db: AsyncSession = Depends(get_db)):
-    return await get_categories(db)
+async def list_categories(request: Request, db: AsyncSession = Depends(get_read_db)):
+    entry = await catalog_cache.get_or_load(("categories",), lambda: render_categories(db))
+    return _json_response(request, entry)
 
 
 @router.get("/menu/items", response_model=list[MenuItemResponse])
-async def list_menu_items(category_id: int | None = None, db: AsyncSession = Depends(get_db)):
-    return await get_menu_items(db, category_id)
+async def list_menu_items(request: Request, category_id: int | None = None, db: AsyncSession = Depends(get_read_db)):
+    entry = await catalog_cache.get_or_load(("items", category_id), lambda: render_items(db, category_id))
+    return _json_response(request, entry)
+
+
+@router.get("/menu/search", response_model=list[MenuItemResponse])
+async def search_menu(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Available items matching every word of ``q`` as a prefix, typos tolerated, best match first."""
+    query = await search_query(db, q, limit)
+    rows = await _items_rows.fetch(db, query) if query is not None else []
+    return Response(content=_items_rows.dumps(rows), media_type="application/json")
 
 
 @router.post("/reservations", response_model=ReservationResponse)
 async def make_reservation(data: ReservationCreate, db: AsyncSession = Depends(get_db)):
-    return await create_reservation(db, data)
+    try:
+        if settings.write_behind:
+            return await ingestor.submit_reservation(data)
+        return await create_reservation(db, data)
+    except SlotFullError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except BacklogFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
+@router.get("/reservations/availability", response_model=list[DayAvailability])
+async def reservation_availability(
+    date: str = Query(..., pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    days: int = Query(1, ge=1, le=7),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Free seats per time slot for one day, or up to a week starting at ``date``."""
+    try:
+        return await get_availability(db, date, days)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date")
 
 
 @router.post("/contact", response_model=ContactResponse)
 async def send_contact(data: ContactCreate, db: AsyncSession = Depends(get_db)):
+    if settings.write_behind:
+        try:
+            return await ingestor.submit_contact(data)
+        except BacklogFullError as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     return await create_contact(db, data)
 
 
 @router.get("/banners", response_model=list[BannerResponse])
-async def list_banners(db: AsyncSession = Depends(get_db)):
-    return await get_banners(db, active_only=True)
+async def list_banners(request: Request, db: AsyncSession = Depends(get_read_db)):
+    entry = await catalog_cache.get_or_load(("banners",), lambda: render_banners(db))
+    return _json_response(request, entry)
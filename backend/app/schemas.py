@@ -1,6 +1,10 @@
 """Pydantic schemas for API."""
 from datetime import datetime
-from pydantic import BaseModel, EmailStr, Field
+from typing import Generic, Literal, TypeVar
+
+from pydantic import BaseModel, EmailStr, Field, computed_field
+
+from .images import srcset_for
 
 
 class CategoryBase(BaseModel):
@@ -57,6 +61,12 @@ class MenuItemResponse(MenuItemBase):
     category_id: int
     created_at: datetime
 
+    @computed_field
+    @property
+    def image_srcset(self) -> dict[str, str] | None:
+        """Resized variants of an uploaded image_url, as a srcset string per format."""
+        return srcset_for(self.image_url)
+
     class Config:
         from_attributes = True
 
@@ -65,6 +75,10 @@ class MenuItemWithCategory(MenuItemResponse):
     category: CategoryResponse | None = None
 
 
+class CategoryWithItems(CategoryResponse):
+    items: list[MenuItemResponse] = []
+
+
 class ReservationCreate(BaseModel):
     name: str = Field(..., min_length=2, max_length=100)
     phone: str = Field(..., min_length=10, max_length=20)
@@ -105,6 +119,31 @@ class ReservationAdminResponse(BaseModel):
         from_attributes = True
 
 
+class ReservationStatusUpdate(BaseModel):
+    status: Literal["pending", "confirmed", "cancelled"]
+
+
+class SlotAvailability(BaseModel):
+    time: str
+    capacity: int
+    booked: int
+    available: int
+
+
+class DayAvailability(BaseModel):
+    date: str
+    slots: list[SlotAvailability]
+
+
+class ReservationStats(BaseModel):
+    """Bookings and guests for one group; dimensions that weren't grouped by are None."""
+    date: str | None
+    time: str | None
+    status: str | None
+    bookings: int
+    guests: int
+
+
 class ContactCreate(BaseModel):
     name: str = Field(..., min_length=2, max_length=100)
     email: EmailStr
@@ -122,6 +161,19 @@ class ContactResponse(BaseModel):
         from_attributes = True
 
 
+class ContactAdminResponse(BaseModel):
+    """Full contact message for the admin panel."""
+    id: int
+    name: str
+    email: str
+    phone: str | None
+    message: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
@@ -160,5 +212,68 @@ class BannerResponse(BannerBase):
     id: int
     created_at: datetime
 
+    @computed_field
+    @property
+    def image_srcset(self) -> dict[str, str] | None:
+        """Resized variants of an uploaded image_url, as a srcset string per format."""
+        return srcset_for(self.image_url)
+
     class Config:
         from_attributes = True
+
+
+class MenuResponse(BaseModel):
+    """Whole public menu in one payload: categories with nested items, plus active banners."""
+    categories: list[CategoryWithItems]
+    banners: list[BannerResponse]
+
+
+class CategoryPatch(CategoryUpdate):
+    id: int
+
+
+class MenuItemPatch(MenuItemUpdate):
+    id: int
+
+
+class BannerPatch(BannerUpdate):
+    id: int
+
+
+CreateT = TypeVar("CreateT", bound=BaseModel)
+PatchT = TypeVar("PatchT", bound=BaseModel)
+ResponseT = TypeVar("ResponseT", bound=BaseModel)
+
+
+class BulkRequest(BaseModel, Generic[CreateT, PatchT]):
+    """Creates, partial updates (by id) and deletes applied together in one transaction."""
+    create: list[CreateT] = []
+    update: list[PatchT] = []
+    delete: list[int] = []
+
+
+class BulkResponse(BaseModel, Generic[ResponseT]):
+    created: list[ResponseT]
+    updated: list[ResponseT]
+    deleted: list[int]
+
+
+class MenuImportItem(MenuItemBase):
+    pass
+
+
+class MenuImportCategory(CategoryBase):
+    name: str | None = None  # required for categories that don't exist yet
+    items: list[MenuImportItem] = []
+
+
+class MenuImport(BaseModel):
+    """Full menu to load: categories are matched by slug, items by name within their category."""
+    categories: list[MenuImportCategory]
+
+
+class MenuImportResult(BaseModel):
+    categories_created: int
+    categories_updated: int
+    items_created: int
+    items_updated: int
@@ -0,0 +1,250 @@
+"""Menu search: an FTS5 index over item names, descriptions and category names.
+
+``menu_search`` holds one row per menu item (rowid = ``menu_items.id``) and is
+kept in sync by triggers, so every write path (crud, bulk, import, raw SQL)
+updates it in the same transaction. Text is indexed with the ``unicode61``
+tokenizer, which case-folds Cyrillic; "ё" is folded to "е" on both sides.
+
+Queries are search-as-you-type: every word is a prefix. A word that matches
+nothing is retried without a Russian inflection ending and then against the
+index vocabulary with a small edit distance, so "борща" finds "Борщ" and
+"капучмно" finds "Капучино".
+"""
+import asyncio
+import bisect
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from sqlalchemy import Select, column, func, literal_column, select, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .cache import catalog_cache
+from .models import MenuItem
+
+# bm25 weights per column: a hit in the name counts most, then the category
+WEIGHTS = (10.0, 1.0, 4.0)
+MAX_TERMS = 8  # words per query; the rest are ignored
+MAX_CORRECTIONS = 5  # vocabulary terms tried for a word that matches nothing
+CORRECTIONS_CACHE_SIZE = 1024  # words per vocabulary whose corrections are remembered
+
+_WORD = re.compile(r"\w+")
+# Common noun/adjective endings, longest first; stripped only from words of 5+ letters
+_ENDINGS = (
+    "ами", "ями", "ого", "его", "ому", "ему", "ыми", "ими",
+    "ов", "ев", "ей", "ой", "ый", "ий", "ая", "яя", "ое", "ее", "ые", "ие", "ам", "ям", "ах", "ях", "ом", "ем",
+    "а", "я", "ы", "и", "у", "ю", "е", "о", "ь",
+)
+
+
+def _fold(sql: str) -> str:
+    return f"replace(replace({sql}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _row(item: str) -> str:
+    """Indexed (name, description, category) values for the ``menu_items`` row ``item``."""
+    return ", ".join(_fold(sql) for sql in (
+        f"{item}.name",
+        f"coalesce({item}.description, '')",
+        f"(SELECT name FROM categories WHERE id = {item}.category_id)",
+    ))
+
+
+DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS menu_search USING fts5("
+    "name, description, category, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS menu_search_vocab USING fts5vocab(menu_search, 'row')",
+    "CREATE TRIGGER IF NOT EXISTS menu_search_ai AFTER INSERT ON menu_items BEGIN "
+    f"INSERT INTO menu_search (rowid, name, description, category) VALUES (new.id, {_row('new')}); END",
+    "CREATE TRIGGER IF NOT EXISTS menu_search_au AFTER UPDATE OF name, description, category_id ON menu_items BEGIN "
+    "DELETE FROM menu_search WHERE rowid = old.id; "
+    f"INSERT INTO menu_search (rowid, name, description, category) VALUES (new.id, {_row('new')}); END",
+    "CREATE TRIGGER IF NOT EXISTS menu_search_ad AFTER DELETE ON menu_items BEGIN "
+    "DELETE FROM menu_search WHERE rowid = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS menu_search_category_au AFTER UPDATE OF name ON categories BEGIN "
+    f"UPDATE menu_search SET category = {_fold('new.name')} "
+    "WHERE rowid IN (SELECT id FROM menu_items WHERE category_id = new.id); END",
+]
+
+_search = table("menu_search", column("rowid"))
+_match = literal_column("menu_search")
+
+
+def ensure_search_index(connection: Connection) -> bool:
+    """Create the index and its triggers if missing; True if the index was (re)built."""
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'menu_search'")
+    ).first()
+    for statement in DDL:
+        connection.execute(text(statement))
+    if exists:
+        return False
+    connection.execute(text(
+        f"INSERT INTO menu_search (rowid, name, description, category) SELECT items.id, {_row('items')} "
+        "FROM menu_items AS items"
+    ))
+    return True
+
+
+def normalize(query: str) -> list[str]:
+    return _WORD.findall(query.lower().replace("ё", "е"))[:MAX_TERMS]
+
+
+def _stem(word: str) -> str | None:
+    if len(word) < 5:
+        return None
+    for ending in _ENDINGS:
+        if word.endswith(ending):
+            return word[: -len(ending)]
+    return None
+
+
+def _next_row(word: str, rows: list[list[int]], text: str) -> list[int]:
+    """Optimal string alignment row (typos incl. swapped letters) of ``word`` against ``text[:len(rows)]``.
+
+    ``rows[k]`` is the row for ``text[:k]``; the last entry of a row is the distance to all of ``word``.
+    """
+    k = len(rows)
+    c = text[k - 1]
+    previous = rows[-1]
+    current = [k] + [0] * len(word)
+    for j, cw in enumerate(word, 1):
+        current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (c != cw))
+        if k > 1 and j > 1 and c == word[j - 2] and text[k - 2] == cw:
+            current[j] = min(current[j], rows[-2][j - 2] + 1)
+    return current
+
+
+@dataclass
+class Vocabulary:
+    """Sorted index terms with document counts, loaded once per catalog version."""
+    version: int
+    terms: list[str]
+    docs: list[int]
+    _corrections: OrderedDict = field(default_factory=OrderedDict, repr=False)
+
+    def has_prefix(self, prefix: str) -> bool:
+        i = bisect.bisect_left(self.terms, prefix)
+        return i < len(self.terms) and self.terms[i].startswith(prefix)
+
+    async def corrections(self, word: str) -> list[str]:
+        """Prefixes of index terms within edit distance 1 (2 for long words) of ``word``, most common first.
+
+        Remembered per word (LRU): search-as-you-type repeats the same words. A new
+        word is looked up in a thread, off the event loop.
+        """
+        found = self._corrections.get(word)
+        if found is not None:
+            self._corrections.move_to_end(word)
+            return found
+        found = await asyncio.to_thread(self._find_corrections, word)
+        self._corrections[word] = found
+        if len(self._corrections) > CORRECTIONS_CACHE_SIZE:
+            self._corrections.popitem(last=False)
+        return found
+
+    def _find_corrections(self, word: str) -> list[str]:
+        if len(word) < 3:
+            return []
+        n = len(word)
+        limit = 1 if n < 6 else 2
+        longest = n + limit  # no longer candidate can be within the limit
+        # Typos in the first letter are rare; only look at terms sharing it
+        lo = bisect.bisect_left(self.terms, word[0])
+        hi = bisect.bisect_left(self.terms, chr(ord(word[0]) + 1), lo)
+        found: dict[str, tuple[int, int]] = {}
+
+        def consider(candidate: str, distance: int, docs: int):
+            if distance <= limit and (candidate not in found or (distance, -docs) < found[candidate]):
+                found[candidate] = (distance, -docs)
+
+        # A walk over the sorted terms as if they were a trie: the rows of the prefix a
+        # term shares with the previous one are reused, and a prefix already further
+        # than the limit from every prefix of ``word`` skips all terms starting with it
+        rows = [list(range(n + 1))]  # rows[k]: distances against rows_text[:k]
+        rows_text = ""
+        i = lo
+        while i < hi:
+            term = self.terms[i]
+            common = 0
+            while common < len(rows) - 1 and common < len(term) and rows_text[common] == term[common]:
+                common += 1
+            del rows[common + 1:]
+            rows_text = term
+            dead = None
+            while len(rows) <= min(len(term), longest):
+                rows.append(_next_row(word, rows, term))
+                if min(rows[-1]) > limit:
+                    dead = len(rows) - 1
+                    break
+            end = i + 1
+            if dead is not None:
+                # Every term starting with term[:dead] is out; their shorter prefixes are the same strings
+                end = bisect.bisect_left(self.terms, term[:dead] + "\U0010ffff", i + 1, hi)
+            docs = max(self.docs[i:end])
+            # The term's prefixes around the word's length (search-as-you-type), and the term itself
+            for length in {min(n - 1, len(term)), min(n, len(term)), min(n + 1, len(term))}:
+                if length < len(rows):
+                    consider(term[:length], rows[length][n], docs)
+            if abs(len(term) - n) <= limit and len(term) < len(rows):
+                consider(term, rows[len(term)][n], self.docs[i])
+            i = end
+        return sorted(found, key=found.get)[:MAX_CORRECTIONS]
+
+
+_vocabulary: Vocabulary | None = None
+
+
+async def get_vocabulary(db: AsyncSession) -> Vocabulary:
+    global _vocabulary
+    version = catalog_cache.version
+    if _vocabulary is None or _vocabulary.version != version:
+        result = await db.execute(text("SELECT term, doc FROM menu_search_vocab ORDER BY term"))
+        rows = result.all()
+        vocabulary = Vocabulary(version, [row[0] for row in rows], [row[1] for row in rows])
+        # Don't keep it if an admin edit landed while we were reading
+        if version == catalog_cache.version:
+            _vocabulary = vocabulary
+        return vocabulary
+    return _vocabulary
+
+
+def _phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"*'
+
+
+async def build_match(db: AsyncSession, query: str) -> str | None:
+    """FTS5 MATCH expression for ``query``, or None if some word can't match anything."""
+    words = normalize(query)
+    if not words:
+        return None
+    vocabulary = await get_vocabulary(db)
+    groups = []
+    for word in words:
+        if vocabulary.has_prefix(word):
+            groups.append(_phrase(word))
+            continue
+        stem = _stem(word)
+        if stem and vocabulary.has_prefix(stem):
+            groups.append(_phrase(stem))
+            continue
+        corrections = await vocabulary.corrections(word)
+        if not corrections:
+            return None
+        groups.append("(" + " OR ".join(_phrase(term) for term in corrections) + ")")
+    return " AND ".join(groups)
+
+
+async def search_query(db: AsyncSession, query: str, limit: int = 20) -> Select | None:
+    """Available items matching every word of ``query``, best match first; None if nothing can match."""
+    match = await build_match(db, query)
+    if match is None:
+        return None
+    return (
+        select(MenuItem)
+        .join(_search, _search.c.rowid == MenuItem.id)
+        .where(_match.op("MATCH")(match), MenuItem.is_available == True)
+        .order_by(func.bm25(_match, *WEIGHTS), MenuItem.sort_order)
+        .limit(limit)
+    )
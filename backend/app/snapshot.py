@@ -0,0 +1,187 @@
+"""Static snapshots of the public catalog, served without going through the API.
+
+Publishing renders the same bodies as ``/api/menu``, ``/api/menu/categories``,
+``/api/menu/items`` (also ``items/<category_id>.json``) and ``/api/banners`` into a
+directory named after their digest, with ``.br``/``.gz`` copies, then atomically
+repoints the ``current`` symlink at it. Any static file server can serve
+``<snapshot_dir>/current/...`` (nginx with ``gzip_static``, or the app's own
+``/snapshots`` mount); the API routes stay as the fallback.
+
+Each worker publishes after committing a catalog change (``KWEN_SNAPSHOT_PUBLISH``),
+and ``python -m app.snapshot`` publishes once from the command line. A file lock
+serializes publishers, and a render is dropped if the catalog version moved on
+while it was being built. The last ``KWEN_SNAPSHOT_KEEP`` versions are kept besides the
+current one, so a client midway through reading an older one doesn't get 404s.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import shutil
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .cache import catalog_cache
+from .compression import FILE_SUFFIXES, compress_variants
+from .config import BASE_DIR, settings
+from .crud import banners_query, categories_query, get_banners, get_categories_with_items, menu_items_query
+from .database import ReadSessionLocal
+from .fastjson import RowSerializer
+from .ipc import async_file_lock
+from .models import Banner, Category, MenuItem
+from .schemas import BannerResponse, CategoryResponse, MenuItemResponse, MenuResponse
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = settings.snapshot_dir or os.path.join(BASE_DIR, "snapshots")
+CURRENT = "current"
+DEBOUNCE = 0.2  # a burst of admin edits is published once
+VERSION_NAME = re.compile(r"^[0-9a-f]{32}$")
+
+_menu_json = TypeAdapter(MenuResponse)
+# Flat lists skip the per-row model validation (see fastjson.py)
+_categories_rows = RowSerializer(CategoryResponse, Category)
+_items_rows = RowSerializer(MenuItemResponse, MenuItem)
+_banners_rows = RowSerializer(BannerResponse, Banner)
+
+
+async def render_menu(db: AsyncSession) -> bytes:
+    menu = {
+        "categories": await get_categories_with_items(db),
+        "banners": await get_banners(db, active_only=True),
+    }
+    return _menu_json.dump_json(_menu_json.validate_python(menu, from_attributes=True))
+
+
+async def render_categories(db: AsyncSession) -> bytes:
+    return _categories_rows.dumps(await _categories_rows.fetch(db, categories_query()))
+
+
+async def render_items(db: AsyncSession, category_id: int | None = None) -> bytes:
+    return _items_rows.dumps(await _items_rows.fetch(db, menu_items_query(category_id)))
+
+
+async def render_banners(db: AsyncSession) -> bytes:
+    return _banners_rows.dumps(await _banners_rows.fetch(db, banners_query(active_only=True)))
+
+
+async def render_snapshot(db: AsyncSession) -> dict[str, bytes]:
+    """Every public catalog body by file name, read in one transaction so they agree."""
+    files = {
+        "menu.json": await render_menu(db),
+        "categories.json": await render_categories(db),
+        "items.json": await render_items(db),
+        "banners.json": await render_banners(db),
+    }
+    for category_id in await db.scalars(select(Category.id).order_by(Category.id)):
+        files[f"items/{category_id}.json"] = await render_items(db, category_id)
+    return files
+
+
+def _write_files(directory: str, files: dict[str, bytes]):
+    for name, body in files.items():
+        path = os.path.join(directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(body)
+        for encoding, compressed in compress_variants(body).items():
+            with open(path + FILE_SUFFIXES[encoding], "wb") as f:
+                f.write(compressed)
+
+
+def _prune(root: str, current: str, keep: int):
+    versions = [
+        entry for entry in os.scandir(root)
+        if entry.is_dir(follow_symlinks=False) and VERSION_NAME.match(entry.name) and entry.name != current
+    ]
+    versions.sort(key=lambda entry: entry.stat(follow_symlinks=False).st_mtime, reverse=True)
+    for entry in versions[keep:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def write_snapshot(root: str, files: dict[str, bytes], keep: int) -> str:
+    """Write ``files`` as a version directory (unless it exists) and make it current; returns its name."""
+    digest = hashlib.blake2b(digest_size=16)
+    for name in sorted(files):
+        digest.update(name.encode() + b"\0" + files[name] + b"\0")
+    name = digest.hexdigest()
+    directory = os.path.join(root, name)
+    if not os.path.isdir(directory):
+        tmp = f"{directory}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)  # left by a crashed publisher
+        os.makedirs(tmp)
+        _write_files(tmp, files)
+        os.rename(tmp, directory)
+    # rename() over the old link: readers see either the old or the new directory, never neither
+    link = os.path.join(root, f"{CURRENT}.tmp")
+    if os.path.lexists(link):
+        os.unlink(link)
+    os.symlink(name, link)
+    os.replace(link, os.path.join(root, CURRENT))
+    _prune(root, name, keep)
+    return name
+
+
+async def publish(root: str = SNAPSHOT_DIR) -> str | None:
+    """Render the catalog and make it the current snapshot; returns the version directory name.
+
+    Returns None without writing if the catalog changed meanwhile: whoever changed
+    it publishes again, and an older render must not replace their newer one.
+    """
+    version = catalog_cache.version  # before reading: the data is at least this new
+    async with ReadSessionLocal() as db:
+        files = await render_snapshot(db)
+    os.makedirs(root, exist_ok=True)
+    async with async_file_lock(os.path.join(root, ".lock")):
+        if catalog_cache.version != version:
+            return None
+        return await asyncio.to_thread(write_snapshot, root, files, settings.snapshot_keep)
+
+
+class SnapshotPublisher:
+    """Republishes the snapshot in the background after each catalog change in this process."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def schedule(self, version: int | None = None):
+        self._wake.set()
+
+    async def start(self):
+        catalog_cache.on_bump.append(self.schedule)
+        self._task = asyncio.create_task(self._run())
+        self.schedule()  # the database may have changed while no worker was running
+
+    async def stop(self):
+        if self.schedule in catalog_cache.on_bump:
+            catalog_cache.on_bump.remove(self.schedule)
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            await asyncio.sleep(DEBOUNCE)
+            self._wake.clear()
+            try:
+                name = await publish(self.root)
+            except Exception:
+                logger.exception("Publishing the catalog snapshot failed")
+                continue
+            if name is not None:
+                logger.info("Published catalog snapshot %s", name)
+
+
+publisher = SnapshotPublisher(SNAPSHOT_DIR)
+
+
+if __name__ == "__main__":
+    name = asyncio.run(publish())
+    print(os.path.join(SNAPSHOT_DIR, name) if name else "The catalog changed while rendering, run again")
@@ -0,0 +1,84 @@
+"""Static file serving for uploaded images."""
+import mimetypes
+import os
+import re
+
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from .compression import FILE_SUFFIXES, SUPPORTED_ENCODINGS, negotiate
+from .images import pick_variant
+from .snapshot import CURRENT
+
+# upload_image names files with a random hex id, so such a URL never changes content
+IMMUTABLE_NAME = re.compile(r"^[0-9a-f]{32}(?:[-.][\w.-]*)?$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MUTABLE_CACHE_CONTROL = "no-cache"
+
+
+class UploadsStaticFiles(StaticFiles):
+    """StaticFiles with a far-future caching policy for generated upload names.
+
+    If ``<file>.br`` / ``<file>.gz`` siblings exist (see ``compression.precompress_file``)
+    they are served to clients that accept them, without compressing per request.
+
+    ``/uploads/<file>?w=640`` serves the smallest resized variant at least 640px wide
+    (see ``images.process_image``), as AVIF/WebP when the Accept header allows it.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        width = QueryParams(scope["query_string"]).get("w")
+        if not width or not width.isdigit():
+            return await super().get_response(path, scope)
+        variant = pick_variant(os.path.basename(path), int(width), Headers(scope=scope).get("accept"))
+        if variant is None:
+            return await super().get_response(path, scope)
+        response = await super().get_response(os.path.join(os.path.dirname(path), variant), scope)
+        vary = response.headers.get("Vary")
+        response.headers["Vary"] = f"{vary}, Accept" if vary else "Accept"
+        return response
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        available = {
+            encoding for encoding in SUPPORTED_ENCODINGS
+            if os.path.isfile(f"{full_path}{FILE_SUFFIXES[encoding]}")
+        } if "accept-encoding" in request_headers else set()
+        encoding = negotiate(request_headers.get("accept-encoding"), available)
+
+        if encoding:
+            encoded_path = f"{full_path}{FILE_SUFFIXES[encoding]}"
+            response = FileResponse(
+                encoded_path,
+                status_code=status_code,
+                media_type=mimetypes.guess_type(str(full_path))[0] or "application/octet-stream",
+                headers={"Content-Encoding": encoding},
+                stat_result=os.stat(encoded_path),
+            )
+        else:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        if available:
+            response.headers["Vary"] = "Accept-Encoding"
+        if IMMUTABLE_NAME.match(os.path.basename(full_path)):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["Cache-Control"] = MUTABLE_CACHE_CONTROL
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+class SnapshotStaticFiles(UploadsStaticFiles):
+    """Catalog snapshots (see ``snapshot.py``) with their precompressed copies.
+
+    ``current/`` is repointed on every publish and must be revalidated; the
+    version directories it points to never change.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+        if path.split("/", 1)[0] != CURRENT and "Cache-Control" in response.headers:
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
@@ -0,0 +1,116 @@
+"""Upload storage: bodies are size-capped while streaming, files are typed by content and named by hash."""
+import asyncio
+import hashlib
+import os
+import tempfile
+
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .config import settings
+from .images import UPLOADS_DIR
+
+CHUNK_SIZE = 256 * 1024
+MULTIPART_OVERHEAD = 64 * 1024  # boundaries and part headers on top of the file itself
+
+# Extension is taken from the file's signature, never from the client's file name
+SIGNATURES = (
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+)
+
+
+def sniff_extension(head: bytes) -> str | None:
+    """Extension for the image format ``head`` starts with, or None if it isn't an allowed one."""
+    for signature, ext in SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail="File too large")
+
+
+class UploadSizeLimitMiddleware:
+    """Reject oversized request bodies on the upload route before they are buffered.
+
+    A declared Content-Length over the limit is refused without reading the body;
+    otherwise the body is counted as it arrives and the request fails with 413 as
+    soon as it crosses the limit.
+    """
+
+    def __init__(self, app: ASGIApp, path: str):
+        self.app = app
+        self.path = path
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+        limit = settings.upload_max_bytes + MULTIPART_OVERHEAD
+        length = Headers(scope=scope).get("content-length")
+        if length and length.isdigit() and int(length) > limit:
+            body = b'{"detail":"File too large"}'
+            await send({
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside the form parser; FastAPI re-raises HTTPExceptions as is
+                    raise _too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def save_upload(file: UploadFile) -> tuple[str, bool]:
+    """Copy an uploaded image into UPLOADS_DIR under its content hash.
+
+    Returns ``(filename, created)``; ``created`` is False when identical bytes were
+    uploaded before and the existing file is reused. Disk writes run in a worker thread.
+    """
+    os.makedirs(UPLOADS_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=UPLOADS_DIR, suffix=".part")
+    digest = hashlib.blake2b(digest_size=16)  # 32 hex chars, see static.IMMUTABLE_NAME
+    size = 0
+    ext = None
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(CHUNK_SIZE):
+                if ext is None:
+                    ext = sniff_extension(chunk)
+                    if ext is None:
+                        raise HTTPException(status_code=400, detail="Allowed: jpg, jpeg, png, webp")
+                size += len(chunk)
+                if size > settings.upload_max_bytes:
+                    raise _too_large()
+                digest.update(chunk)
+                await asyncio.to_thread(out.write, chunk)
+        if ext is None:
+            raise HTTPException(status_code=400, detail="Empty file")
+        filename = f"{digest.hexdigest()}{ext}"
+        path = os.path.join(UPLOADS_DIR, filename)
+        if os.path.exists(path):
+            os.remove(tmp)
+            return filename, False
+        os.replace(tmp, path)
+        return filename, True
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
@@ -0,0 +1,12 @@
+"""Load-test and benchmark harness for the Keny API.
+
+Run from ``backend/``::
+
+    python -m bench seed --scale large --db /tmp/bench.db
+    python -m bench run --db /tmp/bench.db --mode inprocess --out before.json
+    python -m bench run --db /tmp/bench.db --mode uvicorn --out after.json
+    python -m bench compare before.json after.json
+    python -m bench queries   # SQL statements per admin/write route vs. budgets
+    python -m bench plans     # CRUD list queries served by an index, no temp B-tree sorts
+    python -m bench serialize # per-row cost of list serialization, Pydantic vs. fastjson
+"""
@@ -0,0 +1,98 @@
+"""Command line: ``python -m bench {seed,run,compare,queries,plans,serialize}`` (run from backend/)."""
+import argparse
+import json
+import os
+import sys
+
+from .seed import SCALES
+
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench.db")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_cmd = commands.add_parser("seed", help="create a benchmark database (replaces an existing one)")
+    seed_cmd.add_argument("--db", default=DEFAULT_DB)
+    seed_cmd.add_argument("--scale", choices=SCALES, default="small")
+    seed_cmd.add_argument("--seed", type=int, default=1, help="random seed, same seed gives the same data")
+    for table in ("categories", "items", "banners", "reservations", "contacts"):
+        seed_cmd.add_argument(f"--{table}", type=int, help=f"override the number of {table} for the scale")
+
+    run_cmd = commands.add_parser("run", help="benchmark the endpoints against a seeded database")
+    run_cmd.add_argument("--db", default=DEFAULT_DB)
+    run_cmd.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    run_cmd.add_argument("--group", choices=("public", "admin", "all"), default="all")
+    run_cmd.add_argument("--requests", type=int, default=1000, help="requests per endpoint")
+    run_cmd.add_argument("--concurrency", type=int, default=20)
+    run_cmd.add_argument("--warmup", type=int, default=20, help="unmeasured requests per endpoint first")
+    run_cmd.add_argument("--out", help="write the JSON report here instead of stdout")
+
+    compare_cmd = commands.add_parser("compare", help="flag regressions between two reports")
+    compare_cmd.add_argument("baseline")
+    compare_cmd.add_argument("current")
+    compare_cmd.add_argument("--threshold", type=float, default=0.1, help="allowed relative change (0.1 = 10%%)")
+
+    commands.add_parser("queries", help="check the SQL statements per admin/write route against budgets")
+    commands.add_parser("plans", help="check the CRUD list queries use an index, without temp B-tree sorts")
+
+    serialize_cmd = commands.add_parser("serialize", help="per-row cost of list serialization paths")
+    serialize_cmd.add_argument("--rows", type=int, nargs="+", default=[10, 1_000, 100_000])
+
+    args = parser.parse_args(argv)
+    if args.command == "seed":
+        from .seed import seed
+        counts = seed(
+            args.db, args.scale, args.seed,
+            categories=args.categories, items=args.items, banners=args.banners,
+            reservations=args.reservations, contacts=args.contacts,
+        )
+        print(json.dumps(counts, indent=2))
+        return 0
+
+    if args.command == "queries":
+        from .queries import run as check_queries
+        return check_queries()
+
+    if args.command == "plans":
+        from .plans import run as check_plans
+        return check_plans()
+
+    if args.command == "serialize":
+        from .serialize import run as bench_serialize
+        print(json.dumps(bench_serialize(tuple(args.rows)), indent=2))
+        return 0
+
+    if args.command == "run":
+        from .runner import run
+        from .scenarios import GROUPS
+        if not os.path.exists(args.db):
+            parser.error(f"{args.db} does not exist, run `python -m bench seed` first")
+        report = run(args.db, args.mode, GROUPS[args.group], args.requests, args.concurrency, args.warmup)
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if args.out:
+            with open(args.out, "w") as f:
+                f.write(output + "\n")
+        else:
+            print(output)
+        return 0
+
+    from .runner import compare
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    for key in ("mode", "requests", "concurrency"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            print(f"warning: {key} differs ({baseline['meta'].get(key)} vs {current['meta'].get(key)})")
+    regressions = compare(baseline, current, args.threshold)
+    for line in regressions:
+        print("REGRESSION", line)
+    if not regressions:
+        print("No regressions beyond", f"{args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,16 @@
+"""``python -m bench plans``: runs tests/test_query_plans.py, which checks every CRUD list query uses an index."""
+import os
+import sys
+
+import pytest
+
+TEST = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "test_query_plans.py")
+
+
+def run() -> int:
+    """Exit code of the test run: 1 if a query scans without an index or sorts unexpectedly."""
+    return int(pytest.main(["-v", TEST]))
+
+
+if __name__ == "__main__":
+    sys.exit(run())
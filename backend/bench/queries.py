@@ -0,0 +1,16 @@
+"""``python -m bench queries``: runs tests/test_query_budgets.py, which checks the SQL statements per route."""
+import os
+import sys
+
+import pytest
+
+TEST = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "test_query_budgets.py")
+
+
+def run() -> int:
+    """Exit code of the test run: 1 if a route exceeds its statement budget or answers unexpectedly."""
+    return int(pytest.main(["-v", TEST]))
+
+
+if __name__ == "__main__":
+    sys.exit(run())
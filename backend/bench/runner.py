@@ -0,0 +1,163 @@
+"""Drive the app with concurrent clients and summarize latency per endpoint."""
+import asyncio
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from .scenarios import Scenario
+from .seed import table_counts
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: list[float], statuses: dict[int, int], elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)  # noqa: E731
+    return {
+        "requests": len(latencies),
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1]) if latencies else 0.0,
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int, headers: dict) -> dict:
+    total = min(requests, scenario.max_requests or requests)
+    counter = iter(range(total))
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            response = await client.request(
+                scenario.method, scenario.url(i),
+                json=scenario.body(i) if scenario.body else None,
+                headers=headers if scenario.admin else None,
+            )
+            await response.aread()
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+    return summarize(latencies, statuses, time.perf_counter() - start)
+
+
+async def run_all(client: httpx.AsyncClient, scenarios: list[Scenario], requests: int, concurrency: int, warmup: int) -> dict:
+    login = await client.post("/api/admin/login", json={"username": "admin", "password": "admin123"})
+    login.raise_for_status()
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    results = {}
+    for scenario in scenarios:
+        if warmup:
+            await run_scenario(client, scenario, min(warmup, scenario.max_requests or warmup), concurrency, headers)
+        results[scenario.name] = await run_scenario(client, scenario, requests, concurrency, headers)
+        print(f"{scenario.name:45} {results[scenario.name]['rps']:>9} rps  p95 {results[scenario.name]['p95_ms']} ms", file=sys.stderr)
+    return results
+
+
+async def run_inprocess(db_path: str, scenarios: list[Scenario], requests: int, concurrency: int, warmup: int) -> dict:
+    os.environ["KWEN_DATABASE_PATH"] = db_path
+    os.environ["KWEN_RATE_LIMIT_ENABLED"] = "false"  # every request comes from one client
+    os.environ["KWEN_SNAPSHOT_PUBLISH"] = "false"  # don't overwrite the dev snapshots with bench data
+    from app.init_db import init_database
+    from app.main import app
+
+    await init_database()  # ASGITransport doesn't send lifespan events
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        return await run_all(client, scenarios, requests, concurrency, warmup)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def run_uvicorn(db_path: str, scenarios: list[Scenario], requests: int, concurrency: int, warmup: int) -> dict:
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "KWEN_DATABASE_PATH": db_path, "KWEN_RATE_LIMIT_ENABLED": "false", "KWEN_SNAPSHOT_PUBLISH": "false"},
+    )
+    try:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            for _ in range(200):
+                try:
+                    if (await client.get("/api/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None:
+                    raise RuntimeError("uvicorn exited during startup")
+                await asyncio.sleep(0.05)
+            else:
+                raise RuntimeError("uvicorn did not become ready")
+            return await run_all(client, scenarios, requests, concurrency, warmup)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(db_path: str, mode: str, scenarios: list[Scenario], requests: int, concurrency: int, warmup: int) -> dict:
+    """Benchmark every scenario; returns the JSON-ready report."""
+    runner = run_inprocess if mode == "inprocess" else run_uvicorn
+    results = asyncio.run(runner(db_path, scenarios, requests, concurrency, warmup))
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "mode": mode,
+            "requests": requests,
+            "concurrency": concurrency,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "rows": table_counts(db_path),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Endpoints whose p95 grew, or throughput fell, by more than ``threshold`` (a fraction)."""
+    regressions = []
+    for name, before in baseline["results"].items():
+        after = current["results"].get(name)
+        if after is None:
+            continue
+        if before["p95_ms"] and after["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {after['p95_ms']} ms")
+        if before["rps"] and after["rps"] < before["rps"] * (1 - threshold):
+            regressions.append(f"{name}: {before['rps']} -> {after['rps']} rps")
+    return regressions
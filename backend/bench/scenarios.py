@@ -0,0 +1,92 @@
+"""Benchmarked endpoints: every route in routes/public.py and the admin read/write paths."""
+import itertools
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Callable
+
+FAR_FUTURE = date(2100, 1, 1)  # POSTed reservations land here so seeded slots never fill up
+# Random start per run: warmup and repeated runs on one DB don't refill the same slots
+_reservation_numbers = itertools.count(random.randrange(10_000_000))
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    method: str
+    path: str | Callable[[int], str]
+    body: Callable[[int], dict] | None = None
+    admin: bool = False
+    max_requests: int | None = None  # cap for expensive endpoints (bcrypt login, full export)
+
+    def url(self, i: int) -> str:
+        return self.path(i) if callable(self.path) else self.path
+
+
+def _reservation(i: int) -> dict:
+    # 2 guests, 20 per slot with the default 40 seats, so no request is refused as full
+    i = next(_reservation_numbers)
+    day = FAR_FUTURE + timedelta(days=i // 500)
+    minutes = 9 * 60 + (i // 20 % 25) * 30
+    return {
+        "name": f"Bench {i}", "phone": f"+7900{i:07d}", "date": day.isoformat(),
+        "time": f"{minutes // 60:02d}:{minutes % 60:02d}", "guests": 2,
+    }
+
+
+def _contact(i: int) -> dict:
+    return {"name": f"Bench {i}", "email": f"bench{i}@example.com", "message": "Benchmark contact message"}
+
+
+def _item_update(i: int) -> dict:
+    return {"sort_order": i % 50}
+
+
+PUBLIC = [
+    Scenario("GET /api/menu", "GET", "/api/menu"),
+    Scenario("GET /api/menu/categories", "GET", "/api/menu/categories"),
+    Scenario("GET /api/menu/items", "GET", "/api/menu/items"),
+    Scenario("GET /api/menu/items?category_id", "GET", lambda i: f"/api/menu/items?category_id={i % 4 + 1}"),
+    Scenario("GET /api/banners", "GET", "/api/banners"),
+    Scenario("GET /api/menu/search", "GET", lambda i: f"/api/menu/search?q={('Блю', 'блюдо', 'Блюдо 1', 'блдюо 4', 'кате')[i % 5]}"),
+    Scenario(
+        "GET /api/reservations/availability", "GET",
+        lambda i: f"/api/reservations/availability?date={date.today() + timedelta(days=i % 30)}&days=7",
+    ),
+    Scenario("POST /api/reservations", "POST", "/api/reservations", body=_reservation),
+    Scenario("POST /api/contact", "POST", "/api/contact", body=_contact),
+]
+
+ADMIN = [
+    Scenario(
+        "POST /api/admin/login", "POST", "/api/admin/login",
+        body=lambda i: {"username": "admin", "password": "admin123"}, max_requests=50,
+    ),
+    Scenario("GET /api/admin/reservations", "GET", "/api/admin/reservations?limit=100", admin=True),
+    Scenario(
+        "GET /api/admin/reservations?status", "GET",
+        "/api/admin/reservations?limit=100&status=confirmed", admin=True,
+    ),
+    Scenario(
+        "GET /api/admin/reservations/export", "GET",
+        lambda i: f"/api/admin/reservations/export?format=ndjson&date_from={date.today() - timedelta(days=30)}",
+        admin=True, max_requests=20,
+    ),
+    Scenario(
+        "GET /api/admin/analytics/reservations", "GET",
+        lambda i: f"/api/admin/analytics/reservations?date_from={date.today() - timedelta(days=90)}&date_to={date.today()}",
+        admin=True,
+    ),
+    Scenario("GET /api/admin/categories", "GET", "/api/admin/categories", admin=True),
+    Scenario("GET /api/admin/menu/items", "GET", "/api/admin/menu/items", admin=True),
+    Scenario("GET /api/admin/banners", "GET", "/api/admin/banners", admin=True),
+    Scenario("PUT /api/admin/menu/items/{id}", "PUT", "/api/admin/menu/items/1", body=_item_update, admin=True),
+    Scenario(
+        "POST /api/admin/menu/items/bulk", "POST", "/api/admin/menu/items/bulk",
+        body=lambda i: {"update": [{"id": item_id, "sort_order": (i + item_id) % 50} for item_id in range(1, 16)]},
+        admin=True,
+    ),
+    Scenario("GET /api/admin/cache", "GET", "/api/admin/cache", admin=True),
+]
+
+GROUPS = {"public": PUBLIC, "admin": ADMIN, "all": PUBLIC + ADMIN}
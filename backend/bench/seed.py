@@ -0,0 +1,108 @@
+"""Seed a benchmark database at a given scale, deterministically."""
+import asyncio
+import os
+import random
+import sqlite3
+from datetime import date, datetime, timedelta
+
+# rows added on top of the init_db seed (4 categories, 15 items, 1 banner, no reservations)
+SCALES = {
+    "tiny": {"categories": 0, "items": 0, "banners": 0, "reservations": 0, "contacts": 0},
+    "small": {"categories": 20, "items": 500, "banners": 5, "reservations": 10_000, "contacts": 1_000},
+    "large": {"categories": 100, "items": 5_000, "banners": 20, "reservations": 300_000, "contacts": 20_000},
+}
+BATCH_SIZE = 10_000
+STATUSES = ("pending", "pending", "confirmed", "confirmed", "confirmed", "cancelled")
+
+
+def _batches(rows, size: int = BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _reservation_rows(rng: random.Random, count: int, slots: list[str]):
+    today = date.today()
+    created = datetime.utcnow() - timedelta(days=365)
+    step = timedelta(days=425) / max(count, 1)
+    for i in range(count):
+        created += step
+        day = today + timedelta(days=rng.randint(-365, 60))
+        yield (
+            f"Гость {i}", f"+7999{i:07d}", None, day.isoformat(), rng.choice(slots),
+            rng.randint(1, 6), None, rng.choice(STATUSES), created,
+        )
+
+
+def seed(db_path: str, scale: str = "tiny", seed_value: int = 1, **overrides) -> dict:
+    """Create ``db_path`` from scratch at ``scale``; returns the final row counts."""
+    counts = {**SCALES[scale], **{k: v for k, v in overrides.items() if v is not None}}
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    # app settings are read at import time, so point them at the bench DB first
+    os.environ["KWEN_DATABASE_PATH"] = db_path
+    from app.capacity import backfill_slots, day_slots
+    from app.database import get_sync_engine
+    from app.init_db import init_database
+
+    asyncio.run(init_database())
+    rng = random.Random(seed_value)
+    conn = sqlite3.connect(db_path)
+    now = datetime.utcnow()
+    with conn:
+        base = conn.execute("SELECT COALESCE(MAX(sort_order), 0) FROM categories").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO categories (name, slug, description, sort_order, created_at) VALUES (?, ?, ?, ?, ?)",
+            [(f"Категория {i}", f"bench-{i}", "Описание категории", base + i + 1, now) for i in range(counts["categories"])],
+        )
+        category_ids = [row[0] for row in conn.execute("SELECT id FROM categories")]
+        for batch in _batches(
+            (rng.choice(category_ids), f"Блюдо {i}", "Описание блюда " * 4, float(rng.randint(150, 1500)),
+             None, rng.random() > 0.1, rng.randint(0, 50), now)
+            for i in range(counts["items"])
+        ):
+            conn.executemany(
+                "INSERT INTO menu_items (category_id, name, description, price, image_url, is_available, sort_order, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                batch,
+            )
+        conn.executemany(
+            "INSERT INTO banners (title, discount_text, description, is_active, sort_order, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            [(f"Акция {i}", f"{rng.randint(5, 50)}%", "Описание акции", i % 2 == 0, i + 1, now) for i in range(counts["banners"])],
+        )
+        for batch in _batches(_reservation_rows(rng, counts["reservations"], day_slots())):
+            conn.executemany(
+                "INSERT INTO reservations (name, phone, email, date, time, guests, comment, status, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                batch,
+            )
+        for batch in _batches(
+            (f"Гость {i}", f"guest{i}@example.com", None, "Сообщение для кафе " * 3, now)
+            for i in range(counts["contacts"])
+        ):
+            conn.executemany(
+                "INSERT INTO contact_messages (name, email, phone, message, created_at) VALUES (?, ?, ?, ?, ?)", batch
+            )
+        conn.execute("DELETE FROM reservation_slots")
+    conn.execute("PRAGMA optimize")
+    conn.close()
+    with get_sync_engine().begin() as connection:
+        backfill_slots(connection)
+    return table_counts(db_path)
+
+
+def table_counts(db_path: str) -> dict:
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("categories", "menu_items", "banners", "reservations", "contact_messages")
+        }
+    finally:
+        conn.close()
@@ -0,0 +1,81 @@
+"""Per-row cost of list serialization: ORM objects + Pydantic validation vs. column tuples + fastjson.
+
+For 10, 1k and 100k rows of admin reservations and menu items, times three ways to
+produce the response body, each including the query:
+
+- ``response_model``: what FastAPI does for ``response_model=list[...]`` with ORM
+  objects: validate from attributes, dump to Python in JSON mode, ``json.dumps``
+- ``typeadapter``: validate from attributes, then ``TypeAdapter.dump_json``
+- ``fastjson``: tuples of the response columns through ``RowSerializer``
+
+and checks all three produce the same bytes.
+"""
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from .seed import seed
+
+SIZES = (10, 1_000, 100_000)
+MIN_ROWS = 50_000  # rows timed per size and path, small sizes are repeated
+
+
+async def _bench(sizes: tuple[int, ...]) -> list[dict]:
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+
+    from app.database import ReadSessionLocal
+    from app.fastjson import RowSerializer
+    from app.models import MenuItem, Reservation
+    from app.schemas import MenuItemResponse, ReservationAdminResponse
+
+    cases = {
+        "reservations": (ReservationAdminResponse, Reservation),
+        "menu_items": (MenuItemResponse, MenuItem),
+    }
+    results = []
+    for name, (response_model, model) in cases.items():
+        adapter = TypeAdapter(list[response_model])
+        serializer = RowSerializer(response_model, model)
+
+        async def response_model_path(n: int) -> bytes:
+            async with ReadSessionLocal() as db:
+                rows = (await db.execute(select(model).order_by(model.id).limit(n))).scalars().all()
+            content = adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json")
+            return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+        async def typeadapter_path(n: int) -> bytes:
+            async with ReadSessionLocal() as db:
+                rows = (await db.execute(select(model).order_by(model.id).limit(n))).scalars().all()
+            return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+        async def fastjson_path(n: int) -> bytes:
+            async with ReadSessionLocal() as db:
+                rows = await serializer.fetch(db, select(model).order_by(model.id).limit(n))
+            return serializer.dumps(rows)
+
+        paths = {"response_model": response_model_path, "typeadapter": typeadapter_path, "fastjson": fastjson_path}
+        for n in sizes:
+            bodies = {path: await run(n) for path, run in paths.items()}  # also warms up
+            if len(set(bodies.values())) != 1:
+                raise AssertionError(f"{name} x{n}: serialized bodies differ between paths")
+            row = {"case": name, "rows": n}
+            repeats = max(1, MIN_ROWS // n)
+            for path, run in paths.items():
+                start = time.perf_counter()
+                for _ in range(repeats):
+                    await run(n)
+                row[f"{path}_us_per_row"] = round((time.perf_counter() - start) / (repeats * n) * 1e6, 3)
+            row["speedup"] = round(row["response_model_us_per_row"] / row["fastjson_us_per_row"], 1)
+            results.append(row)
+    return results
+
+
+def run(sizes: tuple[int, ...] = SIZES) -> list[dict]:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "serialize.db")
+        largest = max(sizes)
+        seed(db_path, "tiny", items=largest, reservations=largest)
+        return asyncio.run(_bench(sizes))
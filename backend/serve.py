@@ -0,0 +1,42 @@
+"""Production server: several uvicorn workers behind one socket.
+
+The database is migrated and seeded once here, before any worker starts; the
+workers then skip init_database on startup. Send SIGHUP to restart the workers
+(e.g. after a deploy) and SIGTERM/SIGINT to shut down gracefully; a worker that
+dies is replaced by the supervisor.
+"""
+import argparse
+import asyncio
+import os
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Keny API in production mode")
+    parser.add_argument("--host", default=os.environ.get("KWEN_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("KWEN_PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("KWEN_WORKERS", os.cpu_count() or 1)))
+    args = parser.parse_args()
+
+    from app.init_db import init_database
+    asyncio.run(init_database())
+    os.environ["KWEN_INIT_DB_ON_STARTUP"] = "false"  # inherited by the workers
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop="uvloop",
+        http="httptools",
+        backlog=2048,
+        timeout_keep_alive=5,
+        timeout_graceful_shutdown=30,
+        proxy_headers=True,
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
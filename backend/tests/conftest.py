@@ -0,0 +1,23 @@
+"""One seeded database per test session.
+
+App settings are read at import time, so the database path is set here, before
+any test module imports ``app``.
+"""
+import os
+import shutil
+import tempfile
+
+import pytest
+
+DB_DIR = tempfile.mkdtemp(prefix="keny-tests-")
+os.environ["KWEN_DATABASE_PATH"] = os.path.join(DB_DIR, "test.db")
+
+
+@pytest.fixture(scope="session")
+def seeded_db():
+    """The session database at the "small" bench scale: enough rows for the planner statistics."""
+    from bench.seed import seed
+
+    seed(os.environ["KWEN_DATABASE_PATH"], "small")
+    yield os.environ["KWEN_DATABASE_PATH"]
+    shutil.rmtree(DB_DIR, ignore_errors=True)
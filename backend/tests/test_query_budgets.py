@@ -0,0 +1,80 @@
+"""SQL statements per admin and public write route, against a budget per route.
+
+Statements are counted the way /metrics counts them: by the ``RequestStats``
+that ``MetricsMiddleware`` keeps for each request.
+"""
+import asyncio
+
+import httpx
+
+from app import metrics
+from app.main import app
+
+# (method, path, body, expected status, statement budget); {id} is the row the last create returned
+ROUTES = [
+    ("POST", "/api/admin/login", {"username": "admin", "password": "admin123"}, 200, 1),
+    ("GET", "/api/admin/categories", None, 200, 1),
+    ("POST", "/api/admin/categories", {"name": "Q", "slug": "q"}, 200, 1),
+    ("PUT", "/api/admin/categories/1", {"sort_order": 7}, 200, 1),
+    ("PUT", "/api/admin/categories/999999", {"sort_order": 7}, 404, 1),
+    ("DELETE", "/api/admin/categories/{id}", None, 200, 1),
+    ("DELETE", "/api/admin/categories/999999", None, 404, 1),
+    ("GET", "/api/admin/menu/items", None, 200, 1),
+    ("POST", "/api/admin/menu/items", {"name": "Q", "price": 1, "category_id": 1}, 200, 1),
+    ("PUT", "/api/admin/menu/items/1", {"price": 300}, 200, 1),
+    ("PUT", "/api/admin/menu/items/999999", {"price": 300}, 404, 1),
+    ("DELETE", "/api/admin/menu/items/{id}", None, 200, 1),
+    ("DELETE", "/api/admin/menu/items/999999", None, 404, 1),
+    ("POST", "/api/admin/menu/items/bulk", {"update": [{"id": 3, "price": 1}, {"id": 4, "price": 2}]}, 200, 3),
+    ("GET", "/api/admin/banners", None, 200, 1),
+    ("POST", "/api/admin/banners", {"title": "Q"}, 200, 1),
+    ("PUT", "/api/admin/banners/1", {"is_active": False}, 200, 1),
+    ("PUT", "/api/admin/banners/999999", {"is_active": False}, 404, 1),
+    ("DELETE", "/api/admin/banners/{id}", None, 200, 1),
+    ("DELETE", "/api/admin/banners/999999", None, 404, 1),
+    ("GET", "/api/admin/reservations", None, 200, 1),
+    ("GET", "/api/admin/analytics/reservations?date_from=2100-01-01&date_to=2100-03-31", None, 200, 1),
+    ("GET", "/api/admin/archive/reservations", None, 200, 1),
+    ("GET", "/api/admin/archive/contacts", None, 200, 1),
+    # capacity upsert + insert
+    ("POST", "/api/reservations", {"name": "Q Q", "phone": "+79990000000", "date": "2100-01-01", "time": "19:00"}, 200, 2),
+    # the reservation above: load + slot release + update
+    ("PUT", "/api/admin/reservations/{id}", {"status": "cancelled"}, 200, 3),
+    ("PUT", "/api/admin/reservations/999999", {"status": "confirmed"}, 404, 1),
+    ("POST", "/api/contact", {"name": "Q Q", "email": "q@example.com", "message": "Query count check"}, 200, 1),
+]
+
+
+async def _over_budget(requests: list[metrics.RequestStats]) -> list[str]:
+    failures = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://queries") as client:
+        headers, created = {}, None
+        for method, path, body, expected_status, budget in ROUTES:
+            path = path.format(id=created)
+            response = await client.request(method, path, json=body, headers=headers)
+            statements = requests[-1].queries
+            if response.status_code != expected_status or statements > budget:
+                failures.append(
+                    f"{method} {path}: {response.status_code} (want {expected_status}), "
+                    f"{statements} statements (budget {budget})"
+                )
+            if path == "/api/admin/login":
+                headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            elif method == "POST" and response.status_code == 200:
+                created = response.json().get("id", created)
+    return failures
+
+
+def test_statement_budgets(seeded_db, monkeypatch):
+    requests = []
+    request_stats = metrics.RequestStats
+
+    def record() -> metrics.RequestStats:
+        stats = request_stats()
+        requests.append(stats)
+        return stats
+
+    monkeypatch.setattr(metrics, "RequestStats", record)
+    failures = asyncio.run(_over_budget(requests))
+    assert not failures, "\n".join(failures)
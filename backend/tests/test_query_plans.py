@@ -0,0 +1,61 @@
+"""CRUD list queries are served by an index: no full table scan, no unexpected temp B-tree sort.
+
+A missing or unusable index shows up in ``EXPLAIN QUERY PLAN`` as a ``SCAN`` of
+the whole table or a ``USE TEMP B-TREE FOR ORDER BY``.
+"""
+from datetime import datetime
+
+import pytest
+
+from app.crud import (
+    banners_query, categories_query, categories_with_items_query, contacts_query, menu_items_query, reservations_query,
+)
+from app.database import get_sync_engine
+from app.models import ArchivedContactMessage, ArchivedReservation
+
+CURSOR = (datetime(2100, 1, 1), 1)
+# (name, query, may sort)
+QUERIES = [
+    ("categories", categories_query(), False),
+    ("menu", categories_with_items_query(), False),
+    ("menu items", menu_items_query(), False),
+    ("menu items by category", menu_items_query(1), False),
+    ("admin menu items", menu_items_query(None, available_only=False), False),
+    ("admin menu items by category", menu_items_query(1, available_only=False), False),
+    ("banners", banners_query(), False),
+    ("admin banners", banners_query(active_only=False), False),
+    ("reservations", reservations_query(), False),
+    ("reservations after cursor", reservations_query(after=CURSOR), False),
+    ("reservations by status", reservations_query(status="pending"), False),
+    # A date range is found through its index and then sorted by created_at;
+    # LIMIT keeps the sorter to one page, however wide the range
+    ("reservations by date", reservations_query("2100-01-01", "2100-01-31"), True),
+    ("archived reservations", reservations_query(model=ArchivedReservation), False),
+    ("archived contacts", contacts_query(model=ArchivedContactMessage), False),
+    ("archived contacts by date", contacts_query("2100-01-01", "2100-01-31", model=ArchivedContactMessage), False),
+]
+
+
+def _problems(plan: list[str], may_sort: bool) -> list[str]:
+    problems = []
+    for step in plan:
+        if step.startswith("SCAN ") and " USING " not in step:
+            problems.append("full table scan")
+        elif "TEMP B-TREE" in step and not may_sort:
+            problems.append("temp B-tree")
+    return problems
+
+
+@pytest.fixture(scope="module")
+def connection(seeded_db):
+    engine = get_sync_engine()
+    with engine.connect() as connection:
+        yield connection
+    engine.dispose()
+
+
+@pytest.mark.parametrize("query, may_sort", [pytest.param(query, may_sort, id=name) for name, query, may_sort in QUERIES])
+def test_query_uses_an_index(connection, query, may_sort):
+    sql = str(query.limit(100).compile(connection, compile_kwargs={"literal_binds": True}))
+    plan = [row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+    assert not _problems(plan, may_sort), "; ".join(plan)
@@ -15,6 +15,19 @@ export async function fetchApi<T>(path: string, options?: RequestInit): Promise<
   return res.json()
 }
 
+// Public catalog files published by the backend (app/snapshot.py); the API is the fallback
+const SNAPSHOT_BASE = '/snapshots/current'
+
+async function fetchCatalog<T>(file: string, apiPath: string): Promise<T> {
+  try {
+    const res = await fetch(`${SNAPSHOT_BASE}/${file}`)
+    if (res.ok) return await res.json()
+  } catch {
+    // Snapshots not deployed or unreachable
+  }
+  return fetchApi<T>(apiPath)
+}
+
 export async function fetchApiWithAuth<T>(path: string, token: string, options?: RequestInit): Promise<T> {
   const res = await fetch(`${API_BASE}${path}`, {
     ...options,
@@ -89,16 +102,79 @@ export async function uploadFile(file: File, token: string): Promise<{ url: stri
   return res.json()
 }
 
+export type ReservationEvent = { id: number; type: string; data: { reservation_id: number; reservation: Record<string, unknown> | null } }
+
+/**
+ * Подписка на SSE-поток событий броней (`created`, `status`).
+ * EventSource не умеет передавать Authorization, поэтому поток читается через fetch.
+ * При обрыве переподключается с Last-Event-ID и получает только пропущенные события.
+ * Возвращает функцию отписки.
+ */
+export function subscribeReservationEvents(token: string, onEvent: (event: ReservationEvent) => void): () => void {
+  const controller = new AbortController()
+  let lastEventId: string | null = null
+
+  const run = async () => {
+    while (!controller.signal.aborted) {
+      try {
+        const headers: Record<string, string> = { Authorization: `Bearer ${token}` }
+        if (lastEventId) headers['Last-Event-ID'] = lastEventId
+        const res = await fetch(`${API_BASE}/admin/reservations/events`, { headers, signal: controller.signal })
+        if (res.status === 401) return
+        if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`)
+        const reader = res.body.pipeThrough(new TextDecoderStream()).getReader()
+        let buffer = ''
+        for (;;) {
+          const { value, done } = await reader.read()
+          if (done) break
+          buffer += value
+          let end: number
+          while ((end = buffer.indexOf('\n\n')) >= 0) {
+            const block = buffer.slice(0, end)
+            buffer = buffer.slice(end + 2)
+            const fields: Record<string, string> = {}
+            for (const line of block.split('\n')) {
+              if (!line || line.startsWith(':')) continue
+              const sep = line.indexOf(': ')
+              fields[line.slice(0, sep)] = line.slice(sep + 2)
+            }
+            if (fields.id) lastEventId = fields.id
+            if (fields.event && fields.event !== 'ready') {
+              onEvent({ id: Number(fields.id), type: fields.event, data: JSON.parse(fields.data) })
+            }
+          }
+        }
+      } catch (err) {
+        if (controller.signal.aborted) return
+        console.error(err)
+      }
+      await new Promise((resolve) => setTimeout(resolve, 3000))
+    }
+  }
+  run()
+  return () => controller.abort()
+}
+
+type MenuItemDto = { id: number; name: string; description: string | null; price: number; image_url: string | null; image_srcset: Record<string, string> | null; category_id: number }
+type BannerDto = { id: number; title: string; discount_text: string | null; description: string | null; image_url: string | null; image_srcset: Record<string, string> | null; link: string | null; is_active: boolean; sort_order: number }
+
 export const api = {
-  getCategories: () => fetchApi<{ id: number; name: string; slug: string; description: string | null; sort_order: number }[]>('/menu/categories'),
+  getMenu: () =>
+    fetchCatalog<{
+      categories: { id: number; name: string; slug: string; description: string | null; sort_order: number; items: MenuItemDto[] }[]
+      banners: BannerDto[]
+    }>('menu.json', '/menu'),
+  getCategories: () => fetchCatalog<{ id: number; name: string; slug: string; description: string | null; sort_order: number }[]>('categories.json', '/menu/categories'),
   getMenuItems: (categoryId?: number) =>
-    fetchApi<{ id: number; name: string; description: string | null; price: number; image_url: string | null; category_id: number }[]>(
-      categoryId ? `/menu/items?category_id=${categoryId}` : '/menu/items'
-    ),
+    categoryId
+      ? fetchCatalog<MenuItemDto[]>(`items/${categoryId}.json`, `/menu/items?category_id=${categoryId}`)
+      : fetchCatalog<MenuItemDto[]>('items.json', '/menu/items'),
+  searchMenu: (query: string, limit = 20) =>
+    fetchApi<MenuItemDto[]>(`/menu/search?q=${encodeURIComponent(query)}&limit=${limit}`),
   createReservation: (data: { name: string; phone: string; email?: string; date: string; time: string; guests: number; comment?: string }) =>
     postApi<{ id: number }>('/reservations', data),
   createContact: (data: { name: string; email: string; phone?: string; message: string }) =>
     postApi<{ id: number }>('/contact', data),
   getBanners: () =>
-    fetchApi<{ id: number; title: string; discount_text: string | null; description: string | null; image_url: string | null; link: string | null; is_active: boolean; sort_order: number }[]>('/banners'),
+    fetchCatalog<BannerDto[]>('banners.json', '/banners'),
 }
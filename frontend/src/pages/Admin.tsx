@@ -8,6 +8,7 @@ import {
   putApi,
   deleteApi,
   uploadFile,
+  subscribeReservationEvents,
 } from '../api/client'
 
 type Category = { id: number; name: string; slug: string; description: string | null; sort_order: number }
@@ -43,11 +44,23 @@ type Reservation = {
   created_at: string
 }
 
+type ReservationStats = { date: string; status: string; bookings: number; guests: number }
+
 const API_ORIGIN = import.meta.env.VITE_API_ORIGIN || ''
+const STATS_DAYS = 14
+
+// YYYY-MM-DD в локальной зоне, как даты броней
+function localDate(offsetDays = 0): string {
+  const d = new Date()
+  d.setDate(d.getDate() + offsetDays)
+  return new Date(d.getTime() - d.getTimezoneOffset() * 60000).toISOString().slice(0, 10)
+}
 
-function getImageUrl(url: string | null): string {
+function getImageUrl(url: string | null, width?: number): string {
   if (!url) return ''
   if (url.startsWith('http')) return url
+  // /uploads/<file>?w=N serves a resized variant instead of the original
+  if (width && url.startsWith('/uploads/')) return `${API_ORIGIN}${url}?w=${width}`
   return `${API_ORIGIN}${url}`
 }
 
@@ -67,6 +80,17 @@ export default function Admin() {
   const [editingBanner, setEditingBanner] = useState<Banner | null>(null)
   const [showAddBanner, setShowAddBanner] = useState(false)
   const [reservations, setReservations] = useState<Reservation[]>([])
+  const [stats, setStats] = useState<ReservationStats[]>([])
+
+  const loadStats = () => {
+    if (!token) return
+    fetchApiWithAuth<ReservationStats[]>(
+      `/admin/analytics/reservations?date_from=${localDate()}&date_to=${localDate(STATS_DAYS - 1)}&by=date&by=status`,
+      token
+    )
+      .then(setStats)
+      .catch(console.error)
+  }
 
   const loadData = () => {
     if (!token) return
@@ -83,12 +107,38 @@ export default function Admin() {
         setReservations(res)
       })
       .catch(console.error)
+    loadStats()
   }
 
   useEffect(() => {
     if (token) loadData()
   }, [token])
 
+  // Новые брони и смена статуса приходят по SSE, без перезагрузки списка
+  useEffect(() => {
+    if (!token) return
+    return subscribeReservationEvents(token, ({ data }) => {
+      const updated = data.reservation as Reservation | null
+      setReservations((list) => {
+        const rest = list.filter((r) => r.id !== data.reservation_id)
+        if (!updated) return rest
+        return list.some((r) => r.id === updated.id)
+          ? list.map((r) => (r.id === updated.id ? updated : r))
+          : [updated, ...rest]
+      })
+      loadStats()
+    })
+  }, [token])
+
+  const setReservationStatus = async (id: number, status: string) => {
+    if (!token) return
+    try {
+      await putApi(`/admin/reservations/${id}`, { status }, token)
+    } catch (err) {
+      alert(err instanceof Error ? err.message : 'Ошибка')
+    }
+  }
+
   const handleLogin = async (e: React.FormEvent) => {
     e.preventDefault()
     setLoginError('')
@@ -346,6 +396,18 @@ export default function Admin() {
                       }}>
                         {r.status === 'pending' ? 'Ожидает' : r.status === 'confirmed' ? 'Подтверждено' : 'Отменено'}
                       </span>
+                      <div style={{ display: 'flex', gap: '0.5rem', marginTop: '0.5rem' }}>
+                        {r.status !== 'confirmed' && (
+                          <button onClick={() => setReservationStatus(r.id, 'confirmed')} style={{ fontSize: '0.8rem', color: 'green' }}>
+                            Подтвердить
+                          </button>
+                        )}
+                        {r.status !== 'cancelled' && (
+                          <button onClick={() => setReservationStatus(r.id, 'cancelled')} style={{ fontSize: '0.8rem', color: 'gray' }}>
+                            Отменить
+                          </button>
+                        )}
+                      </div>
                     </div>
                   </div>
                 </div>
@@ -354,6 +416,40 @@ export default function Admin() {
           </div>
         </section>
 
+        {/* Загрузка по дням: из агрегатов, без выборки самих броней */}
+        <section style={{ marginBottom: '2.5rem' }}>
+          <h2 style={{ fontSize: '1.25rem', marginBottom: '1rem' }}>Загрузка на {STATS_DAYS} дней</h2>
+          <table style={{ width: '100%', maxWidth: 560, borderCollapse: 'collapse', fontSize: '0.95rem' }}>
+            <thead>
+              <tr style={{ textAlign: 'left', color: 'var(--color-text-muted)' }}>
+                <th style={{ padding: '0.25rem 0.5rem' }}>Дата</th>
+                <th style={{ padding: '0.25rem 0.5rem' }}>Броней</th>
+                <th style={{ padding: '0.25rem 0.5rem' }}>Гостей</th>
+                <th style={{ padding: '0.25rem 0.5rem' }}>Ожидают</th>
+                <th style={{ padding: '0.25rem 0.5rem' }}>Отменено</th>
+              </tr>
+            </thead>
+            <tbody>
+              {Array.from({ length: STATS_DAYS }, (_, i) => localDate(i)).map((day) => {
+                const rows = stats.filter((s) => s.date === day)
+                const active = rows.filter((s) => s.status !== 'cancelled')
+                const sum = (list: ReservationStats[], key: 'bookings' | 'guests') => list.reduce((n, s) => n + s[key], 0)
+                return (
+                  <tr key={day} style={{ borderTop: '1px solid var(--color-cream-dark)' }}>
+                    <td style={{ padding: '0.25rem 0.5rem' }}>{day}</td>
+                    <td style={{ padding: '0.25rem 0.5rem' }}>{sum(active, 'bookings')}</td>
+                    <td style={{ padding: '0.25rem 0.5rem', fontWeight: 600 }}>{sum(active, 'guests')}</td>
+                    <td style={{ padding: '0.25rem 0.5rem' }}>{sum(rows.filter((s) => s.status === 'pending'), 'bookings')}</td>
+                    <td style={{ padding: '0.25rem 0.5rem', color: 'var(--color-text-muted)' }}>
+                      {sum(rows.filter((s) => s.status === 'cancelled'), 'bookings')}
+                    </td>
+                  </tr>
+                )
+              })}
+            </tbody>
+          </table>
+        </section>
+
         {/* Categories */}
         <section style={{ marginBottom: '2.5rem' }}>
           <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', marginBottom: '1rem' }}>
@@ -458,7 +554,7 @@ export default function Admin() {
               >
                 {b.image_url && (
                   <div style={{ width: 80, height: 45, borderRadius: 'var(--radius-sm)', overflow: 'hidden', flexShrink: 0, background: 'var(--color-sand)' }}>
-                    <img src={getImageUrl(b.image_url)} alt="" style={{ width: '100%', height: '100%', objectFit: 'cover' }} />
+                    <img src={getImageUrl(b.image_url, 320)} alt="" style={{ width: '100%', height: '100%', objectFit: 'cover' }} />
                   </div>
                 )}
                 <div style={{ flex: 1, minWidth: 0 }}>
@@ -540,7 +636,7 @@ export default function Admin() {
                   }}
                 >
                   {item.image_url ? (
-                    <img src={getImageUrl(item.image_url)} alt="" style={{ width: '100%', height: '100%', objectFit: 'cover' }} />
+                    <img src={getImageUrl(item.image_url, 320)} alt="" style={{ width: '100%', height: '100%', objectFit: 'cover' }} />
                   ) : (
                     <div style={{ width: '100%', height: '100%', display: 'flex', alignItems: 'center', justifyContent: 'center', fontSize: '1.5rem' }}>☕</div>
                   )}
@@ -5,7 +5,7 @@ import { motion } from 'framer-motion'
 import { Coffee, UtensilsCrossed, MapPin, ChevronDown } from 'lucide-react'
 import { api } from '../api/client'
 
-type Banner = { id: number; title: string; discount_text: string | null; description: string | null; image_url: string | null; link: string | null }
+type Banner = { id: number; title: string; discount_text: string | null; description: string | null; image_url: string | null; image_srcset: Record<string, string> | null; link: string | null }
 
 export default function Home() {
   const [banners, setBanners] = useState<Banner[]>([])
@@ -123,7 +123,12 @@ export default function Home() {
                 >
                   {banner.image_url && (
                     <div className="banner-image">
-                      <img src={banner.image_url} alt={banner.title} />
+                      <picture>
+                        {banner.image_srcset && Object.entries(banner.image_srcset).map(([format, srcSet]) => (
+                          <source key={format} type={`image/${format}`} srcSet={srcSet} sizes="(max-width: 768px) 100vw, 400px" />
+                        ))}
+                        <img src={banner.image_url} alt={banner.title} />
+                      </picture>
                     </div>
                   )}
                   <div className="banner-content">
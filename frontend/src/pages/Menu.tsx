@@ -1,4 +1,4 @@
-import { useEffect, useState, useCallback } from 'react'
+import { useEffect, useRef, useState, useCallback } from 'react'
 import { Helmet } from 'react-helmet-async'
 import { motion } from 'framer-motion'
 
@@ -18,6 +18,7 @@ const IMG_EXTS = ['.jpg', '.jpeg', '.png']
 
 type Category = { id: number; name: string; slug: string; description: string | null; sort_order: number }
 type MenuItem = { id: number; name: string; description: string | null; price: number; image_url: string | null; category_id: number }
+type CategoryWithItems = Category & { items: MenuItem[] }
 
 function getImageUrl(url: string | null): string {
   if (!url) return ''
@@ -57,27 +58,100 @@ function MenuItemImage({ urls, alt }: { urls: string[]; alt: string }) {
   return <img src={src} alt={alt} onError={onError} style={{ width: '100%', height: '100%', objectFit: 'cover' }} loading="lazy" />
 }
 
+function MenuItemCard({ item, categorySlug, delay }: { item: MenuItem; categorySlug: string; delay: number }) {
+  const imgUrls = getMenuItemImageUrls(item, categorySlug)
+  return (
+    <motion.article
+      initial={{ opacity: 0, y: 16 }}
+      animate={{ opacity: 1, y: 0 }}
+      transition={{ delay }}
+      style={{
+        background: '#FFFFFF',
+        borderRadius: 'var(--radius-lg)',
+        overflow: 'hidden',
+        boxShadow: 'var(--shadow-soft)',
+        transition: 'transform var(--transition), box-shadow var(--transition)',
+      }}
+      className="menu-card"
+    >
+      <div
+        style={{
+          aspectRatio: '4/3',
+          background: 'var(--color-primary-light)',
+          position: 'relative',
+          overflow: 'hidden',
+        }}
+      >
+        {imgUrls.length > 0 ? (
+          <MenuItemImage urls={imgUrls} alt={item.name} />
+        ) : (
+          <div
+            style={{
+              width: '100%',
+              height: '100%',
+              display: 'flex',
+              alignItems: 'center',
+              justifyContent: 'center',
+              color: 'var(--color-secondary)',
+              opacity: 0.4,
+              fontSize: '2.5rem',
+            }}
+          >
+            ☕
+          </div>
+        )}
+      </div>
+      <div style={{ padding: '1.25rem' }}>
+        <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'flex-start', gap: '0.75rem' }}>
+          <h3 style={{ fontSize: '1.15rem', fontWeight: 600, flex: 1 }}>{item.name}</h3>
+          <span style={{ fontWeight: 600, color: 'var(--color-secondary)', whiteSpace: 'nowrap' }}>
+            {item.price} ₽
+          </span>
+        </div>
+        {item.description && (
+          <p style={{ fontSize: '0.9rem', color: 'var(--color-text-on-light-muted)', marginTop: '0.5rem', lineHeight: 1.5 }}>
+            {item.description}
+          </p>
+        )}
+      </div>
+    </motion.article>
+  )
+}
+
 export default function Menu() {
-  const [categories, setCategories] = useState<Category[]>([])
-  const [items, setItems] = useState<MenuItem[]>([])
+  const [categories, setCategories] = useState<CategoryWithItems[]>([])
   const [selectedCategory, setSelectedCategory] = useState<number | null>(null)
   const [loading, setLoading] = useState(true)
+  const [query, setQuery] = useState('')
+  const [results, setResults] = useState<MenuItem[] | null>(null)
+  const searchSeq = useRef(0)
 
   useEffect(() => {
-    Promise.all([api.getCategories(), api.getMenuItems()])
-      .then(([cats, menuItems]) => {
-        setCategories(cats)
-        setItems(menuItems)
-      })
+    api.getMenu()
+      .then((menu) => setCategories(menu.categories))
       .catch(console.error)
       .finally(() => setLoading(false))
   }, [])
 
+  // Поиск по мере ввода: запрос после паузы, ответы на устаревший ввод отбрасываются
+  useEffect(() => {
+    const q = query.trim()
+    const seq = ++searchSeq.current
+    if (!q) {
+      setResults(null)
+      return
+    }
+    const timer = setTimeout(() => {
+      api.searchMenu(q)
+        .then((items) => { if (seq === searchSeq.current) setResults(items) })
+        .catch(console.error)
+    }, 150)
+    return () => clearTimeout(timer)
+  }, [query])
+
+  const slugByCategory = new Map(categories.map((c) => [c.id, c.slug]))
+
   const grouped = categories
-    .map((cat) => ({
-      ...cat,
-      items: items.filter((i) => i.category_id === cat.id),
-    }))
     .filter((g) => g.items.length > 0)
     .filter((g) => !selectedCategory || g.id === selectedCategory)
 
@@ -127,6 +201,23 @@ export default function Menu() {
           </div>
         ) : (
           <>
+            <input
+              type="search"
+              value={query}
+              onChange={(e) => setQuery(e.target.value)}
+              placeholder="Поиск по меню"
+              aria-label="Поиск по меню"
+              style={{
+                display: 'block',
+                width: '100%',
+                maxWidth: 480,
+                margin: '0 auto 1.5rem',
+                padding: '0.75rem 1.25rem',
+                borderRadius: 'var(--radius-full)',
+                border: '1px solid rgba(139, 115, 85, 0.2)',
+                fontSize: '1rem',
+              }}
+            />
             <motion.div
               initial={{ opacity: 0 }}
               animate={{ opacity: 1 }}
@@ -173,6 +264,24 @@ export default function Menu() {
               ))}
             </motion.div>
 
+            {results !== null ? (
+              results.length === 0 ? (
+                <p style={{ textAlign: 'center', color: 'var(--color-text-on-light-muted)' }}>Ничего не найдено</p>
+              ) : (
+                <div
+                  className="menu-items-grid"
+                  style={{
+                    display: 'grid',
+                    gridTemplateColumns: 'repeat(auto-fill, minmax(min(100%, 280px), 1fr))',
+                    gap: '1.5rem',
+                  }}
+                >
+                  {results.map((item, ii) => (
+                    <MenuItemCard key={item.id} item={item} categorySlug={slugByCategory.get(item.category_id) ?? ''} delay={ii * 0.03} />
+                  ))}
+                </div>
+              )
+            ) : (
             <div style={{ display: 'flex', flexDirection: 'column', gap: '3rem' }}>
               {grouped.map((group, gi) => (
                 <motion.section
@@ -204,69 +313,14 @@ export default function Menu() {
                       gap: '1.5rem',
                     }}
                   >
-                    {group.items.map((item, ii) => {
-                      const imgUrls = getMenuItemImageUrls(item, group.slug)
-                      return (
-                      <motion.article
-                        key={item.id}
-                        initial={{ opacity: 0, y: 16 }}
-                        animate={{ opacity: 1, y: 0 }}
-                        transition={{ delay: gi * 0.08 + ii * 0.05 }}
-                        style={{
-                          background: '#FFFFFF',
-                          borderRadius: 'var(--radius-lg)',
-                          overflow: 'hidden',
-                          boxShadow: 'var(--shadow-soft)',
-                          transition: 'transform var(--transition), box-shadow var(--transition)',
-                        }}
-                        className="menu-card"
-                      >
-                        <div
-                          style={{
-                            aspectRatio: '4/3',
-                            background: 'var(--color-primary-light)',
-                            position: 'relative',
-                            overflow: 'hidden',
-                          }}
-                        >
-                          {imgUrls.length > 0 ? (
-                            <MenuItemImage urls={imgUrls} alt={item.name} />
-                          ) : (
-                            <div
-                              style={{
-                                width: '100%',
-                                height: '100%',
-                                display: 'flex',
-                                alignItems: 'center',
-                                justifyContent: 'center',
-                                color: 'var(--color-secondary)',
-                                opacity: 0.4,
-                                fontSize: '2.5rem',
-                              }}
-                            >
-                              ☕
-                            </div>
-                          )}
-                        </div>
-                        <div style={{ padding: '1.25rem' }}>
-                          <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'flex-start', gap: '0.75rem' }}>
-                            <h3 style={{ fontSize: '1.15rem', fontWeight: 600, flex: 1 }}>{item.name}</h3>
-                            <span style={{ fontWeight: 600, color: 'var(--color-secondary)', whiteSpace: 'nowrap' }}>
-                              {item.price} ₽
-                            </span>
-                          </div>
-                          {item.description && (
-                            <p style={{ fontSize: '0.9rem', color: 'var(--color-text-on-light-muted)', marginTop: '0.5rem', lineHeight: 1.5 }}>
-                              {item.description}
-                            </p>
-                          )}
-                        </div>
-                      </motion.article>
-                    )})}
+                    {group.items.map((item, ii) => (
+                      <MenuItemCard key={item.id} item={item} categorySlug={group.slug} delay={gi * 0.08 + ii * 0.05} />
+                    ))}
                   </div>
                 </motion.section>
               ))}
             </div>
+            )}
           </>
         )}
       </div>
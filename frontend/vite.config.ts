@@ -8,6 +8,7 @@ export default defineConfig({
     proxy: {
       '/api': 'http://localhost:8000',
       '/uploads': 'http://localhost:8000',
+      '/snapshots': 'http://localhost:8000',
     },
   },
 })